@@ -1,67 +1,189 @@
 """FastAPI application for Talisik URL Shortener"""
 
-from fastapi import FastAPI, HTTPException, status
-from fastapi.responses import RedirectResponse
+from fastapi import FastAPI, HTTPException, Query, status
+from fastapi.responses import JSONResponse, RedirectResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, HttpUrl
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional
+from datetime import datetime, UTC
+from functools import lru_cache
+from urllib.parse import urlsplit
+import anyio.to_thread
+import orjson
 import uvicorn
 import os
+import sys
 
-from talisik.core.shortener import URLShortener
+from talisik.core.shortener import MAX_URL_LENGTH, URLShortener
 from talisik.core.models import ShortenRequest
+from talisik.core.cache import TTLCache
+
+
+class OrjsonResponse(JSONResponse):
+    """JSONResponse rendered by orjson (FastAPI's ORJSONResponse is deprecated).
+
+    Datetimes serialize as RFC 3339; aware UTC values keep their +00:00 offset.
+    """
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+# Storage calls are blocking and run in anyio's worker threads, so in-flight
+# database round-trips per worker are capped by this limiter (anyio default: 40)
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "100"))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Size the threadpool once the event loop is running"""
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    yield
+
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Talisik URL Shortener API",
     description="Privacy-focused URL shortener inspired by tnyr.me",
     version="0.1.0",
+    default_response_class=OrjsonResponse,
+    lifespan=lifespan,
+)
+
+# Dynamic CORS configuration for custom domain support (origins stripped once at startup)
+cors_origins = tuple(
+    origin.strip()
+    for origin in os.getenv("CORS_ORIGINS", "http://localhost:3000,http://localhost:5173,http://localhost:8080,http://127.0.0.1:3000,http://127.0.0.1:5173").split(",")
+    if origin.strip()
 )
 
-# Dynamic CORS configuration for custom domain support
-cors_origins = os.getenv("CORS_ORIGINS", "http://localhost:3000,http://localhost:5173,http://localhost:8080,http://127.0.0.1:3000,http://127.0.0.1:5173").split(",")
+# Request headers browsers may send cross-origin. Authorization is sent by the
+# npm client when apiKey is set; add any custom client headers here (or "*")
+cors_headers = tuple(
+    header.strip().lower()
+    for header in os.getenv("CORS_HEADERS", "content-type,authorization").split(",")
+    if header.strip()
+)
 
+# Explicit methods/headers (no "*") let Starlette answer preflights from
+# static headers instead of echoing the request's headers back
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=[origin.strip() for origin in cors_origins],  # Support downlodr.com
+    allow_origins=cors_origins,  # Support downlodr.com
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "HEAD"],
+    allow_headers=cors_headers,
 )
 
+# Compress JSON payloads (e.g. /api/urls); small bodies and bodyless 301s pass through untouched
+app.add_middleware(GZipMiddleware, minimum_size=500, compresslevel=4)
+
 # Initialize URL shortener with dynamic base URL (supports custom domain)
 base_url = os.getenv("BASE_URL", "http://localhost:8000")
 shortener = URLShortener(base_url=base_url)
 
+# Per-worker cache of expand() results so popular codes skip the storage read.
+# Entries live at most 30s and never past the link's expires_at; delete() and
+# deactivate() in this process drop them at once. Changes made by other
+# processes show up within 30s, plus XataStorage's own 30s read cache.
+_expand_cache = TTLCache(maxsize=100_000, ttl=30)
+shortener.on_invalidate(_expand_cache.pop)
+
+
+@lru_cache(maxsize=4096)
+def is_valid_url(url: str) -> bool:
+    """Cheap http(s) URL check - avoids Pydantic's HttpUrl regex/IDNA pipeline"""
+    parsed = urlsplit(url)
+    return parsed.scheme in ("http", "https") and bool(parsed.netloc)
+
+
+@lru_cache(maxsize=8192)
+def _is_safe_redirect(url: str) -> bool:
+    """Memoized destination check - popular short codes re-expand to the same URL"""
+    parsed = urlsplit(url)
+    return bool(parsed.scheme and parsed.netloc)
+
+
+@lru_cache(maxsize=16384)
+def _redirect_headers(url: str) -> tuple:
+    """Pre-encoded 301 headers (quoted Location + Content-Length) per destination"""
+    return tuple(RedirectResponse(url=url, status_code=status.HTTP_301_MOVED_PERMANENTLY).raw_headers)
+
+
+def _redirect_response(url: str) -> Response:
+    """301 built from cached headers.
+
+    The header list is copied per request rather than sharing one Response
+    instance, since middleware (CORS, GZip) mutates raw_headers in place.
+    """
+    response = Response(status_code=status.HTTP_301_MOVED_PERMANENTLY)
+    response.raw_headers = list(_redirect_headers(url))
+    return response
+
+
+def _expand_cached(short_code: str) -> Optional[str]:
+    """shortener.expand() behind the TTL cache - hits still count the click"""
+    original_url = _expand_cache.get(short_code)
+    if original_url is not None:
+        shortener.record_click(short_code)
+        return original_url
+    
+    short_url = shortener.resolve(short_code)
+    if short_url is None:
+        return None
+    
+    ttl = None  # cache default
+    if short_url.expires_at is not None:
+        ttl = min(_expand_cache.ttl, (short_url.expires_at - datetime.now(UTC)).total_seconds())
+    _expand_cache.set(short_code, short_url.original_url, ttl=ttl)
+    return short_url.original_url
+
 
 # Pydantic models for API
 class ShortenUrlRequest(BaseModel):
-    url: HttpUrl
+    # Length is checked before validate_url, so oversized input never reaches its cache
+    url: str = Field(max_length=MAX_URL_LENGTH)
     custom_code: Optional[str] = None
-    expires_hours: Optional[int] = None
+    expires_hours: Optional[int] = Field(None, ge=0)  # 0 = no expiry
+
+    @field_validator("url")
+    @classmethod
+    def validate_url(cls, v: str) -> str:
+        if not is_valid_url(v):
+            raise ValueError("Invalid URL: must be an absolute http(s) URL")
+        return v
 
 class ShortenUrlResponse(BaseModel):
     short_url: str
     original_url: str
     short_code: str
-    expires_at: Optional[str] = None
+    expires_at: Optional[datetime] = None
+
+
+# Root payload is static - build and serialize it once at import (health checks hit "/" constantly)
+_ENDPOINTS = {
+    "shorten": "POST /shorten",
+    "expand": "GET /{short_code}",
+    "info": "GET /info/{short_code}",
+    "stats": "GET /api/stats",
+    "docs": "GET /docs"
+}
+_ROOT_PAYLOAD = {
+    "service": "Talisik URL Shortener",
+    "version": app.version,
+    "endpoints": _ENDPOINTS
+}
+_ROOT_BODY = orjson.dumps(_ROOT_PAYLOAD)
 
 
 # API Endpoints
 @app.get("/")
 async def root():
     """API root - basic info"""
-    return {
-        "service": "Talisik URL Shortener",
-        "version": "0.1.0",
-        "endpoints": {
-            "shorten": "POST /shorten",
-            "expand": "GET /{short_code}",
-            "info": "GET /info/{short_code}",
-            "stats": "GET /api/stats",
-            "docs": "GET /docs"
-        }
-    }
+    # Fresh Response around the cached body: middleware mutates headers in place
+    return Response(content=_ROOT_BODY, media_type="application/json")
 
 @app.post("/shorten", response_model=ShortenUrlResponse)
 async def shorten_url(request: ShortenUrlRequest):
@@ -69,13 +191,13 @@ async def shorten_url(request: ShortenUrlRequest):
     try:
         # Convert FastAPI model to library model
         lib_request = ShortenRequest(
-            url=str(request.url),
+            url=request.url,
             custom_code=request.custom_code,
             expires_hours=request.expires_hours
         )
         
         # Use our library to shorten
-        result = shortener.shorten(lib_request)
+        result = await run_in_threadpool(shortener.shorten, lib_request)
         
         # Check if the operation was successful
         if not result.success:
@@ -84,12 +206,14 @@ async def shorten_url(request: ShortenUrlRequest):
                 detail=result.error or "Failed to shorten URL"
             )
         
-        return ShortenUrlResponse(
-            short_url=result.short_url,
-            original_url=result.original_url,
-            short_code=result.short_code,
-            expires_at=result.expires_at.isoformat() if result.expires_at else None
-        )
+        # Return a Response directly so FastAPI skips re-validating the
+        # already-validated result against response_model (kept for the docs)
+        return OrjsonResponse({
+            "short_url": result.short_url,
+            "original_url": result.original_url,
+            "short_code": result.short_code,
+            "expires_at": result.expires_at
+        })
         
     except HTTPException:
         # Re-raise HTTP exceptions
@@ -103,15 +227,20 @@ async def shorten_url(request: ShortenUrlRequest):
 @app.get("/api/stats")
 async def get_stats():
     """Get basic statistics"""
-    return shortener.get_stats()
+    # Handlers below return OrjsonResponse themselves: their payloads are
+    # plain JSON types, so FastAPI's jsonable_encoder walk is pure overhead
+    return OrjsonResponse(await run_in_threadpool(shortener.get_stats))
 
 @app.get("/api/urls")
-async def get_all_urls():
-    """Get list of all shortened URLs for table display"""
+async def get_all_urls(
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+):
+    """Get list of shortened URLs for table display (newest first, optionally paged)"""
     try:
         # Get all URLs from storage - we'll add this method to URLShortener
-        urls = shortener.get_all_urls()
-        return {"urls": urls}
+        urls = await run_in_threadpool(shortener.get_all_urls, limit, offset)
+        return OrjsonResponse({"urls": urls})
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -121,7 +250,7 @@ async def get_all_urls():
 @app.get("/info/{short_code}")
 async def get_url_info(short_code: str):
     """Get information about a short URL without redirecting"""
-    info = shortener.get_info(short_code)
+    info = await run_in_threadpool(shortener.get_info, short_code)
     
     if not info:
         raise HTTPException(
@@ -129,53 +258,60 @@ async def get_url_info(short_code: str):
             detail=f"Short code '{short_code}' not found"
         )
     
-    return info
+    return OrjsonResponse(info)
 
 @app.get("/{short_code}")
 async def redirect_url(short_code: str):
     """Redirect to original URL (main shortener functionality)"""
-    original_url = shortener.expand(short_code)
+    original_url = await run_in_threadpool(_expand_cached, short_code)
     
     if not original_url:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Short code '{short_code}' not found or expired"
-        )
+        # Bare 404: bot-scanned random codes skip the exception handler + JSON encode
+        return Response(status_code=status.HTTP_404_NOT_FOUND)
     
     # Basic URL validation to prevent open redirects
-    from urllib.parse import urlparse
-    parsed = urlparse(original_url)
-    if not parsed.scheme or not parsed.netloc:
+    if not _is_safe_redirect(original_url):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid destination URL"
         )
     
-    return RedirectResponse(url=original_url, status_code=status.HTTP_301_MOVED_PERMANENTLY)
+    return _redirect_response(original_url)
 
 @app.head("/{short_code}")
 async def head_redirect_url(short_code: str):
     """HEAD request for redirect (returns redirect headers without body for client SDK expand method)"""
-    original_url = shortener.expand(short_code)
+    original_url = await run_in_threadpool(_expand_cached, short_code)
     
     if not original_url:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Short code '{short_code}' not found or expired"
-        )
+        # Bare 404: bot-scanned random codes skip the exception handler + JSON encode
+        return Response(status_code=status.HTTP_404_NOT_FOUND)
     
     # Basic URL validation to prevent open redirects
-    from urllib.parse import urlparse
-    parsed = urlparse(original_url)
-    if not parsed.scheme or not parsed.netloc:
+    if not _is_safe_redirect(original_url):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid destination URL"
         )
     
-    return RedirectResponse(url=original_url, status_code=status.HTTP_301_MOVED_PERMANENTLY)
+    return _redirect_response(original_url)
 
 
 # Development server
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000, reload=True) 
\ No newline at end of file
+    # MemoryStorage lives inside a single process, so only fan out across
+    # cores when a shared storage backend (e.g. Xata) is configured
+    workers = (os.cpu_count() or 1) if shortener.config.storage_backend != "memory" else 1
+    if workers > 1 and shortener.config.enable_bloom_filter:
+        # Each worker's filter would miss codes created by its siblings
+        print("ENABLE_BLOOM_FILTER is set - running a single worker")
+        workers = 1
+    uvicorn.run(
+        "api.main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop" if sys.platform != "win32" else "asyncio",
+        http="httptools",
+        reload=False,
+        workers=workers,
+    ) 
\ No newline at end of file
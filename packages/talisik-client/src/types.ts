@@ -22,7 +22,7 @@ export interface ShortenRequest {
   url: string;
   /** Custom short code (optional) */
   customCode?: string | null;
-  /** Expiration time in hours (optional) */
+  /** Expiration time in hours (optional; omitted, null or 0 = never expires, negative is rejected) */
   expiresHours?: number | null;
 }
 
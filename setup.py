@@ -19,19 +19,26 @@ setup(
         "Intended Audience :: Developers",
         "License :: OSI Approved :: MIT License",
         "Programming Language :: Python :: 3",
-        "Programming Language :: Python :: 3.9",
-        "Programming Language :: Python :: 3.10",
         "Programming Language :: Python :: 3.11",
+        "Programming Language :: Python :: 3.12",
     ],
-    python_requires=">=3.9",
+    python_requires=">=3.11",  # datetime.UTC, fromisoformat("...Z")
     install_requires=[
         "pydantic>=2.0.0",
         "python-dotenv>=1.0.0",  # For environment variables
         "xata>=1.0.0",           # Xata Python client
     ],
     extras_require={
-        "api": ["fastapi>=0.100.0", "uvicorn[standard]>=0.20.0"],
-        "dev": ["pytest>=7.0.0", "pytest-cov>=4.0.0", "black>=23.0.0", "ruff>=0.1.0"],
+        "api": [
+            "fastapi>=0.100.0",
+            "uvicorn[standard]>=0.20.0",
+            "uvloop>=0.19; sys_platform != 'win32'",  # Faster event loop
+            "httptools>=0.6",                         # Faster HTTP parser
+            "orjson>=3.9",                            # Faster JSON responses
+        ],
+        "dev": ["pytest>=7.0.0", "pytest-cov>=4.0.0", "pytest-xdist>=3.0", "black>=23.0.0", "ruff>=0.1.0"],
         "xata": ["xata>=1.0.0"],  # Optional Xata dependency group
+        "redis": ["redis>=5.0.0"],  # Shared store for multi-worker deployments
+        "validation": ["ada-url>=1.0"],  # WHATWG URL validation (C++ parser)
     },
 ) 
\ No newline at end of file
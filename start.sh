@@ -9,4 +9,7 @@ export PYTHONUNBUFFERED=1
 exec gunicorn -w 1 -k uvicorn.workers.UvicornWorker --bind 0.0.0.0:8080 --timeout 600 api.main:app
 
 # Option 2: Run with uvicorn directly (alternative)
-# exec uvicorn api.main:app --host 0.0.0.0 --port 8080 
\ No newline at end of file
+# exec uvicorn api.main:app --host 0.0.0.0 --port 8080
+
+# Option 3: One worker per core - requires a shared store (STORAGE_BACKEND=redis or xata)
+# exec uvicorn api.main:app --host 0.0.0.0 --port 8080 --workers $(nproc) --loop uvloop --http httptools 
\ No newline at end of file
@@ -1,15 +1,24 @@
 """Configuration management for Talisik Short URL service"""
 
 import os
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, fields
+from typing import Mapping, Optional
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
+_TRUTHY = frozenset(('true', '1', 'yes'))
 
-@dataclass
+
+def _as_bool(value: Optional[str], default: bool) -> bool:
+    """Parse an env flag - true/1/yes (any case) enable it, unset keeps the default"""
+    if value is None:
+        return default
+    return value.strip().lower() in _TRUTHY
+
+
+@dataclass(slots=True, frozen=True)
 class TalisikConfig:
     """Configuration class for Talisik Short URL service"""
     
@@ -19,23 +28,35 @@ class TalisikConfig:
     
     # Application Configuration
     base_url: str = "http://localhost:8000"
-    storage_backend: str = "memory"  # "memory" or "xata"
+    storage_backend: str = "memory"  # "memory", "xata" or "redis"
+    redis_url: str = "redis://localhost:6379/0"
     default_code_length: int = 7
     max_custom_code_length: int = 50
     
     # Feature flags
     enable_analytics: bool = True
     enable_expiration: bool = True
+    # Reject unknown codes in-process; only safe when this process is the sole writer
+    enable_bloom_filter: bool = False
+    bloom_filter_capacity: int = 1_000_000
     
     # Development settings
     debug: bool = False
     log_level: str = "INFO"
     
     @classmethod
-    def from_env(cls) -> 'TalisikConfig':
-        """Create configuration from environment variables"""
-        xata_api_key = os.getenv('XATA_API_KEY')
-        xata_database_url = os.getenv('XATA_DATABASE_URL')
+    def from_env(cls, env: Optional[Mapping[str, str]] = None) -> 'TalisikConfig':
+        """
+        Create configuration from environment variables
+        
+        Args:
+            env: Mapping to read from (defaults to os.environ, read at call time)
+        """
+        env = os.environ if env is None else env
+        # With slots=True the class attributes are slot descriptors, not defaults
+        defaults = {f.name: f.default for f in fields(cls)}
+        xata_api_key = env.get('XATA_API_KEY')
+        xata_database_url = env.get('XATA_DATABASE_URL')
         
         if not xata_api_key:
             raise ValueError("XATA_API_KEY environment variable is required")
@@ -45,14 +66,17 @@ class TalisikConfig:
         return cls(
             xata_api_key=xata_api_key,
             xata_database_url=xata_database_url,
-            base_url=os.getenv('BASE_URL', cls.base_url),
-            storage_backend=os.getenv('STORAGE_BACKEND', cls.storage_backend),
-            default_code_length=int(os.getenv('DEFAULT_CODE_LENGTH', cls.default_code_length)),
-            max_custom_code_length=int(os.getenv('MAX_CUSTOM_CODE_LENGTH', cls.max_custom_code_length)),
-            enable_analytics=os.getenv('ENABLE_ANALYTICS', 'true').lower() == 'true',
-            enable_expiration=os.getenv('ENABLE_EXPIRATION', 'true').lower() == 'true',
-            debug=os.getenv('DEBUG', 'false').lower() == 'true',
-            log_level=os.getenv('LOG_LEVEL', cls.log_level),
+            base_url=env.get('BASE_URL', defaults['base_url']),
+            storage_backend=env.get('STORAGE_BACKEND', defaults['storage_backend']),
+            redis_url=env.get('REDIS_URL', defaults['redis_url']),
+            default_code_length=int(env.get('DEFAULT_CODE_LENGTH', defaults['default_code_length'])),
+            max_custom_code_length=int(env.get('MAX_CUSTOM_CODE_LENGTH', defaults['max_custom_code_length'])),
+            enable_analytics=_as_bool(env.get('ENABLE_ANALYTICS'), True),
+            enable_expiration=_as_bool(env.get('ENABLE_EXPIRATION'), True),
+            enable_bloom_filter=_as_bool(env.get('ENABLE_BLOOM_FILTER'), False),
+            bloom_filter_capacity=int(env.get('BLOOM_FILTER_CAPACITY', defaults['bloom_filter_capacity'])),
+            debug=_as_bool(env.get('DEBUG'), False),
+            log_level=env.get('LOG_LEVEL', defaults['log_level']),
         )
     
     def validate(self) -> None:
@@ -63,8 +87,8 @@ class TalisikConfig:
         if self.max_custom_code_length < 1 or self.max_custom_code_length > 100:
             raise ValueError("max_custom_code_length must be between 1 and 100")
         
-        if self.storage_backend not in ["memory", "xata"]:
-            raise ValueError("storage_backend must be 'memory' or 'xata'")
+        if self.storage_backend not in ["memory", "xata", "redis"]:
+            raise ValueError("storage_backend must be 'memory', 'xata' or 'redis'")
 
 
 # Global configuration instance
@@ -5,9 +5,9 @@ from datetime import datetime
 from typing import Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class ShortURL:
-    """Represents a shortened URL with metadata"""
+    """Represents a shortened URL with metadata (mutable - storage updates clicks/status)"""
     id: str
     original_url: str
     short_code: str
@@ -17,7 +17,7 @@ class ShortURL:
     is_active: bool = True
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ShortenRequest:
     """Request model for URL shortening"""
     url: str
@@ -25,7 +25,7 @@ class ShortenRequest:
     expires_hours: Optional[int] = None
 
 
-@dataclass  
+@dataclass(slots=True, frozen=True)
 class ShortenResponse:
     """Response model for URL shortening"""
     short_url: str
@@ -38,23 +38,10 @@ class ShortenResponse:
     @classmethod
     def success_response(cls, short_url: str, original_url: str, short_code: str, expires_at: Optional[datetime] = None) -> 'ShortenResponse':
         """Create a successful response"""
-        return cls(
-            short_url=short_url,
-            original_url=original_url,
-            short_code=short_code,
-            success=True,
-            error=None,
-            expires_at=expires_at
-        )
+        # Positional args (field order) skip keyword matching on the hot /shorten path
+        return cls(short_url, original_url, short_code, True, None, expires_at)
     
     @classmethod
     def error_response(cls, error: str, original_url: str = "", short_code: str = "", short_url: str = "") -> 'ShortenResponse':
         """Create an error response"""
-        return cls(
-            short_url=short_url,
-            original_url=original_url,
-            short_code=short_code,
-            success=False,
-            error=error,
-            expires_at=None
-        ) 
\ No newline at end of file
+        return cls(short_url, original_url, short_code, False, error, None) 
\ No newline at end of file
@@ -2,19 +2,108 @@
 
 import secrets
 import string
-import base64
-import json
 from datetime import datetime, timedelta, UTC
-from typing import Optional, Dict, Any, List
-from urllib.parse import urlparse
+from functools import lru_cache
+from typing import Optional, Dict, Any, List, Callable, Tuple
 import logging
 
 from .models import ShortURL, ShortenRequest, ShortenResponse
 from .config import get_config, TalisikConfig
 from .storage import create_storage, AbstractStorage
+from .cache import BloomFilter
 
 logger = logging.getLogger(__name__)
 
+# WHATWG URL parser (C++, pip install ada-url); optional stricter validation
+try:
+    from ada_url import check_url as _ada_check_url
+except ImportError:
+    _ada_check_url = None
+
+# URL scheme rules (RFC 3986: ALPHA *( ALPHA / DIGIT / "+" / "-" / "." ))
+_SCHEME_CHARS = frozenset(string.ascii_letters + string.digits + "+-.")
+_MAX_SCHEME_LEN = 16
+
+# Longest accepted URL (the de facto browser limit, as pydantic's HttpUrl used)
+MAX_URL_LENGTH = 2083
+
+# Longest accepted expiry (10 years); larger requests are clamped
+_MAX_EXPIRES_HOURS = 24 * 365 * 10
+
+# Short code alphabet as a 256-entry byte translation table (248 = 4 * 62)
+_ALPHABET = string.ascii_letters + string.digits
+_ALPHABET_BYTES = _ALPHABET.encode('ascii')
+_CODE_TABLE = bytes(_ALPHABET_BYTES[b % len(_ALPHABET_BYTES)] for b in range(256))
+_CODE_REJECT = bytes(range(248, 256))
+
+# downlodr.com share links carry a base64 JSON payload after this marker
+_DOWNLODR_PREFIX = "downlodr.com/share-video/?shareId="
+_DOWNLODR_PREFIX_LEN = len(_DOWNLODR_PREFIX)
+_DOWNLODR_SHARE_URL = ("https://" + _DOWNLODR_PREFIX).encode('ascii')
+_DOWNLODR_HOSTS = (
+    "https://downlodr.com/", "http://downlodr.com/",
+    "https://www.downlodr.com/", "http://www.downlodr.com/",
+)
+
+
+@lru_cache(maxsize=None)
+def _json_codec() -> Tuple[Callable[[bytes], Any], Callable[[Any], bytes]]:
+    """
+    Import the shareId JSON codec on first use
+    
+    Only downlodr share links need it, so ordinary shortens never pay for
+    the import. orjson (installed with the [api] extra) is preferred; the
+    stdlib fallback is configured for the same compact, bytes output.
+    """
+    try:
+        import orjson
+        return orjson.loads, orjson.dumps
+    except ImportError:
+        import json
+        
+        def dumps(obj: Any) -> bytes:
+            return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode('utf-8')
+        
+        return json.loads, dumps
+
+
+def _is_valid_url(url: str) -> bool:
+    """Reject oversized URLs before they can become LRU cache keys"""
+    return len(url) <= MAX_URL_LENGTH and _is_well_formed_url(url)
+
+
+@lru_cache(maxsize=4096)
+def _is_well_formed_url(url: str) -> bool:
+    """
+    Basic URL validation - requires scheme://netloc
+    
+    A plain string scan instead of urlparse(): we only need to know that
+    both parts are present, not the parsed components. Module-level so the
+    LRU cache is keyed on the URL alone; re-submitted URLs (bulk imports,
+    retries) skip the scan entirely. When ada-url is installed, URLs that
+    pass the scan must also parse as WHATWG URLs (bad ports, hosts, etc.).
+    """
+    idx = url.find("://")
+    if idx <= 0 or idx > _MAX_SCHEME_LEN:
+        return False
+    
+    scheme = url[:idx]
+    if not (scheme[0].isalpha() and _SCHEME_CHARS.issuperset(scheme)):
+        return False
+    
+    # Netloc runs until the first path/query/fragment delimiter
+    start = idx + 3
+    end = len(url)
+    for delim in "/?#":
+        pos = url.find(delim, start, end)
+        if pos != -1:
+            end = pos
+    
+    netloc = url[start:end]
+    if not netloc or any(map(str.isspace, netloc)):
+        return False
+    return _ada_check_url is None or _ada_check_url(url)
+
 
 class URLShortener:
     """Main URL shortener class - now with pluggable storage backends"""
@@ -33,12 +122,53 @@ class URLShortener:
         
         # Set base URL
         self.base_url = (base_url or self.config.base_url).rstrip('/')
+        self._base_url_prefix = self.base_url + '/'
         
         # Initialize storage backend
         self.storage = storage or create_storage(self.config)
         
-        logger.info(f"URLShortener initialized with {type(self.storage).__name__} storage backend")
+        # Called with a short code after delete()/deactivate(), so callers
+        # caching resolve() results can drop it (see on_invalidate)
+        self._invalidation_listeners: List[Callable[[str], Any]] = []
+        
+        # Optional in-process filter of known codes (see _load_known_codes)
+        self._known_codes = self._load_known_codes() if self.config.enable_bloom_filter else None
+        
+        logger.info("URLShortener initialized with %s storage backend", type(self.storage).__name__)
 
+    def _load_known_codes(self) -> Optional[BloomFilter]:
+        """
+        Build a Bloom filter of every stored short code
+        
+        Lets expand()/get_info() reject unknown codes without a storage
+        round-trip. Codes created by other processes are invisible to it,
+        so it is only enabled when this process is the only writer. Returns
+        None (filter disabled) if the store could not be read completely -
+        an empty filter over a non-empty store would 404 every link.
+        """
+        try:
+            codes = self.storage.get_all_short_codes()
+        except Exception as e:
+            logger.warning("Could not load short codes, bloom filter disabled: %s", e)
+            return None
+        if len(codes) != self.storage.get_stats().get("total_urls", 0):
+            logger.warning("Could not load all short codes, bloom filter disabled")
+            return None
+        
+        known_codes = BloomFilter(max(self.config.bloom_filter_capacity, 2 * len(codes)))
+        for code in codes:
+            known_codes.add(code)
+        logger.info("Bloom filter loaded with %s short codes", len(codes))
+        return known_codes
+    
+    def on_invalidate(self, listener: Callable[[str], Any]) -> None:
+        """Register a callback run with each short code that is deleted or deactivated"""
+        self._invalidation_listeners.append(listener)
+    
+    def _invalidate(self, short_code: str) -> None:
+        for listener in self._invalidation_listeners:
+            listener(short_code)
+    
     def _modify_downlodr_url(self, url: str, expires_at: Optional[datetime], short_code: str) -> str:
         """
         Modify downlodr.com URLs to replace createdAt with expires_at in shareId
@@ -50,49 +180,86 @@ class URLShortener:
         Returns:
             Modified URL or original URL if not a downlodr.com share-video URL
         """
+        # Fast path: almost every URL is rejected by a C-level prefix test
+        if not expires_at or not url.startswith(_DOWNLODR_HOSTS):
+            return url
+        
+        # Check if this is a downlodr.com share-video URL
+        prefix_pos = url.find(_DOWNLODR_PREFIX)
+        if prefix_pos == -1:
+            return url
+        
+        # Extract shareId from URL
+        encoded_share_id = url[prefix_pos + _DOWNLODR_PREFIX_LEN:]
+        
+        # Deferred until a share link is actually seen (cached in sys.modules)
+        import base64
+        json_loads, json_dumps = _json_codec()
+        
+        # Decode the shareId (base64 decode); only this part can raise
         try:
-            # Check if this is a downlodr.com share-video URL
-            if "downlodr.com/share-video/?shareId=" not in url:
-                return url
-            
-            # If no expiration date, return original URL
-            if not expires_at:
-                return url
-            
-            # Extract shareId from URL
-            share_id_start = url.find("shareId=") + 8
-            encoded_share_id = url[share_id_start:]
+            # Both JSON backends accept the raw bytes, no UTF-8 decode step
+            payload = json_loads(base64.b64decode(encoded_share_id))
             
-            # Decode the shareId (base64 decode)
-            try:
-                decoded_payload = base64.b64decode(encoded_share_id).decode('utf-8')
-                payload = json.loads(decoded_payload)
-                
-                # Replace createdAt with expires_at
-                payload['expiresAt'] = expires_at.isoformat()
-                
-                # Re-encode the payload
-                new_encoded_payload = base64.b64encode(
-                    json.dumps({
-                        "url": payload['url'],
-                        "expiresAt": payload['expiresAt'],
-                        "shortCode": short_code
-                    }).encode('utf-8')
-                ).decode('utf-8')
-                
-                # Reconstruct the URL
-                modified_url = f"https://downlodr.com/share-video/?shareId={new_encoded_payload}"
-                
-                logger.debug(f"Modified downlodr URL: replaced createdAt with expires_at")
-                return modified_url
-                
-            except (json.JSONDecodeError, base64.binascii.Error) as decode_error:
-                logger.warning(f"Failed to decode shareId, using original URL: {decode_error}")
-                return url
-                    
-        except Exception as e:
-            logger.error(f"Error modifying downlodr URL: {e}")
+            # Re-encode the payload with expires_at in place of createdAt
+            new_encoded_payload = base64.b64encode(
+                json_dumps({
+                    "url": payload['url'],
+                    "expiresAt": expires_at.isoformat(),
+                    "shortCode": short_code
+                })
+            )
+        except (ValueError, KeyError, TypeError) as decode_error:
+            # ValueError covers both JSONDecodeErrors, binascii.Error and UnicodeDecodeError
+            logger.warning("Failed to decode shareId, using original URL: %s", decode_error)
             return url
+        
+        logger.debug("Modified downlodr URL: replaced createdAt with expires_at")
+        # Stay in bytes until the end; a single ASCII decode builds the result
+        return (_DOWNLODR_SHARE_URL + new_encoded_payload).decode('ascii')
+    
+    @staticmethod
+    def _validation_error(request: ShortenRequest) -> Optional[str]:
+        """Why a request can't be stored, or None if it is valid"""
+        if not _is_valid_url(request.url):
+            return "Invalid URL provided"
+        # Would only write a row that is already expired (0 means no expiry)
+        if request.expires_hours is not None and request.expires_hours < 0:
+            return "expires_hours must not be negative"
+        return None
+    
+    def _build_short_url(self, request: ShortenRequest, now: datetime, short_code: str) -> ShortURL:
+        """Turn a validated request into the ShortURL to store"""
+        # Calculate expiration date (clamped, so garbage input can't overflow)
+        expires_at = None
+        if request.expires_hours:  # None or 0: never expires
+            expires_at = now + timedelta(hours=min(request.expires_hours, _MAX_EXPIRES_HOURS))
+
+        # Modify downlodr URLs if needed (guard inlined so other URLs skip the call)
+        modified_url = request.url
+        if expires_at and modified_url.startswith(_DOWNLODR_HOSTS):
+            modified_url = self._modify_downlodr_url(modified_url, expires_at, short_code)
+        
+        # Create short URL object using modified URL
+        return ShortURL(
+            id="" if self.storage.assigns_ids else secrets.token_urlsafe(16),  # Xata sets xata_id on insert
+            original_url=modified_url,  # Use modified URL
+            short_code=short_code,
+            created_at=now,
+            expires_at=expires_at
+        )
+    
+    def _stored_response(self, short_url_obj: ShortURL) -> ShortenResponse:
+        """Success response for a ShortURL that has just been stored"""
+        if self._known_codes is not None:
+            self._known_codes.add(short_url_obj.short_code)
+        
+        return ShortenResponse.success_response(
+            short_url=self._base_url_prefix + short_url_obj.short_code,
+            original_url=short_url_obj.original_url,
+            short_code=short_url_obj.short_code,
+            expires_at=short_url_obj.expires_at
+        )
     
     def shorten(self, request: ShortenRequest) -> ShortenResponse:
         """
@@ -100,50 +267,80 @@ class URLShortener:
         
         Following Kaizen: Enhanced with database persistence while keeping the same API
         """
+        # Validate URL and expiry before any storage work
+        error = self._validation_error(request)
+        if error:
+            return ShortenResponse.error_response(error, original_url=request.url)
+        
+        # One clock read serves both created_at and expires_at
+        now = datetime.now(UTC)
+        
+        short_url_obj = self._build_short_url(request, now, request.custom_code or self._generate_code())
+        short_code = short_url_obj.short_code
+        
+        # Conflict check and write are a single storage round-trip
         try:
-            # Validate URL (basic validation to start)
-            if not self._is_valid_url(request.url):
-                return ShortenResponse.error_response("Invalid URL provided", original_url=request.url)
-            
-            # Calculate expiration date
-            expires_at = None
-            if request.expires_hours:
-                expires_at = datetime.now(UTC) + timedelta(milliseconds=request.expires_hours)
-
-            # Generate short code
-            short_code = request.custom_code or self._generate_code()
-
-            # Modify downlodr URLs if needed
-            modified_url = self._modify_downlodr_url(request.url, expires_at, short_code)
-            
-            # Check for conflicts using storage backend
-            if self.storage.exists(short_code):
+            if not self.storage.set_if_absent(short_url_obj):
                 return ShortenResponse.error_response(f"Short code '{short_code}' already exists", original_url=request.url)
-            
-            # Create short URL object using modified URL
-            short_url_obj = ShortURL(
-                id=secrets.token_urlsafe(16),  # Will be overridden by Xata if using XataStorage
-                original_url=modified_url,  # Use modified URL
-                short_code=short_code,
-                created_at=datetime.now(),
-                expires_at=expires_at
-            )
-            
-            # Store using storage backend
-            self.storage.set(short_url_obj)
-            logger.debug(f"Successfully shortened URL: {request.url} -> {short_code}")
-            
-            return ShortenResponse.success_response(
-                short_url=f"{self.base_url}/{short_code}",
-                original_url=modified_url,
-                short_code=short_code,
-                expires_at=expires_at
-            )
-            
         except Exception as e:
             error_msg = f"Failed to store shortened URL: {e}"
             logger.error(error_msg)
             return ShortenResponse.error_response(error_msg, original_url=request.url)
+        
+        logger.debug("Successfully shortened URL: %s -> %s", request.url, short_code)
+        return self._stored_response(short_url_obj)
+    
+    def shorten_many(self, requests: List[ShortenRequest]) -> List[ShortenResponse]:
+        """
+        Shorten a batch of URLs with one storage call
+        
+        Codes for all requests without a custom code come from a single
+        random read, and every valid request is written through one
+        set_many_if_absent() call. Responses are returned in request order;
+        each fails or succeeds independently, as with shorten() - a write
+        error only fails the items it affected.
+        """
+        now = datetime.now(UTC)
+        generated = iter(self._generate_codes(sum(1 for r in requests if not r.custom_code)))
+        
+        responses: List[Optional[ShortenResponse]] = [None] * len(requests)
+        pending: List[Tuple[int, ShortURL]] = []
+        for index, request in enumerate(requests):
+            # Consume the generated code even for invalid requests to keep the pairing simple
+            short_code = request.custom_code or next(generated)
+            error = self._validation_error(request)
+            if error:
+                responses[index] = ShortenResponse.error_response(error, original_url=request.url)
+                continue
+            
+            pending.append((index, self._build_short_url(request, now, short_code)))
+        
+        if pending:
+            try:
+                stored = self.storage.set_many_if_absent([obj for _, obj in pending])
+            except Exception as e:
+                error_msg = f"Failed to store shortened URL: {e}"
+                logger.error(error_msg)
+                for index, _ in pending:
+                    responses[index] = ShortenResponse.error_response(error_msg, original_url=requests[index].url)
+                return responses
+            
+            stored_count = 0
+            for (index, short_url_obj), ok in zip(pending, stored):
+                if isinstance(ok, Exception):
+                    error_msg = f"Failed to store shortened URL: {ok}"
+                    logger.error(error_msg)
+                    responses[index] = ShortenResponse.error_response(error_msg, original_url=requests[index].url)
+                elif ok:
+                    stored_count += 1
+                    responses[index] = self._stored_response(short_url_obj)
+                else:
+                    responses[index] = ShortenResponse.error_response(
+                        f"Short code '{short_url_obj.short_code}' already exists", original_url=requests[index].url
+                    )
+            logger.debug("Shortened batch of %s URLs (%s stored)", len(requests), stored_count)
+        
+        return responses
     
     def expand(self, short_code: str) -> Optional[str]:
         """
@@ -151,32 +348,55 @@ class URLShortener:
         
         Enhanced with persistent storage and better error handling
         """
-
+        short_url = self.resolve(short_code)
+        return short_url.original_url if short_url else None
+    
+    def resolve(self, short_code: str) -> Optional[ShortURL]:
+        """
+        expand(), returning the live record instead of just its URL
+        
+        For callers that cache the result and need expires_at to bound it
+        """
+        # Fetch and count the click in one storage round-trip; the backend
+        # only counts it if the checks below will pass for the same `now`
+        if self._known_codes is not None and short_code not in self._known_codes:
+            logger.debug("Short code not found: %s", short_code)
+            return None
+        
+        now = datetime.now(UTC)
         try:
-            short_url = self.storage.get(short_code)
-            if not short_url:
-                logger.debug(f"Short code not found: {short_code}")
-                return None
-                
-            # Check if expired
-            if short_url.expires_at and datetime.now(UTC) > short_url.expires_at:
-                logger.debug(f"Short code expired: {short_code}")
-                return None
-            
-            # Check if active
-            if not short_url.is_active:
-                logger.debug(f"Short code inactive: {short_code}")
-                return None
-            
-            # Increment click count using storage backend
-            new_count = self.storage.update_click_count(short_code)
-            if new_count is not None:
-                logger.debug(f"Updated click count for {short_code}: {new_count}")
-            
-            return short_url.original_url
+            short_url = self.storage.get_and_increment(short_code, now)
+        except Exception as e:
+            logger.error("Error expanding short code %s: %s", short_code, e)
+            return None
+        
+        if not short_url:
+            logger.debug("Short code not found: %s", short_code)
+            return None
             
+        # Check if expired
+        if short_url.expires_at and now > short_url.expires_at:
+            logger.debug("Short code expired: %s", short_code)
+            return None
+        
+        # Check if active
+        if not short_url.is_active:
+            logger.debug("Short code inactive: %s", short_code)
+            return None
+        
+        logger.debug("Updated click count for %s: %s", short_code, short_url.click_count)
+        return short_url
+    
+    def record_click(self, short_code: str) -> Optional[int]:
+        """
+        Increment the click count without re-reading the record
+        
+        Lets callers that cache expand() results still count every redirect
+        """
+        try:
+            return self.storage.update_click_count(short_code)
         except Exception as e:
-            logger.error(f"Error expanding short code {short_code}: {e}")
+            logger.error("Error recording click for %s: %s", short_code, e)
             return None
     
     def get_info(self, short_code: str) -> Optional[Dict[str, Any]]:
@@ -185,24 +405,36 @@ class URLShortener:
         
         Enhanced with persistent storage access
         """
+        if self._known_codes is not None and short_code not in self._known_codes:
+            return None
+        
         try:
             url_obj = self.storage.get(short_code)
-            if not url_obj:
-                return None
-            
-            return {
-                "short_code": short_code,
-                "original_url": url_obj.original_url,
-                "created_at": url_obj.created_at.isoformat(),
-                "expires_at": url_obj.expires_at.isoformat() if url_obj.expires_at else None,
-                "click_count": url_obj.click_count,
-                "is_active": url_obj.is_active,
-                "is_expired": url_obj.expires_at and datetime.now(UTC) > url_obj.expires_at if url_obj.expires_at else False
-            }
-            
         except Exception as e:
-            logger.error(f"Error getting info for short code {short_code}: {e}")
+            logger.error("Error getting info for short code %s: %s", short_code, e)
             return None
+        
+        if not url_obj:
+            return None
+        
+        # Read expires_at once; the clock is only consulted when it is set
+        expires_at = url_obj.expires_at
+        if expires_at:
+            expires_iso = expires_at.isoformat()
+            is_expired = datetime.now(UTC) > expires_at
+        else:
+            expires_iso = None
+            is_expired = False
+        
+        return {
+            "short_code": short_code,
+            "original_url": url_obj.original_url,
+            "created_at": url_obj.created_at.isoformat(),
+            "expires_at": expires_iso,
+            "click_count": url_obj.click_count,
+            "is_active": url_obj.is_active,
+            "is_expired": is_expired
+        }
     
     def stats(self) -> Dict[str, Any]:
         """
@@ -213,7 +445,7 @@ class URLShortener:
         try:
             return self.storage.get_stats()
         except Exception as e:
-            logger.error(f"Error getting statistics: {e}")
+            logger.error("Error getting statistics: %s", e)
             return {"total_urls": 0, "active_urls": 0, "total_clicks": 0}
     
     def delete(self, short_code: str) -> bool:
@@ -224,13 +456,15 @@ class URLShortener:
         """ 
         try:
             result = self.storage.delete(short_code)
-            if result:
-                logger.debug(f"Successfully deleted short code: {short_code}")
-            else:
-                logger.debug(f"Short code not found for deletion: {short_code}")
+            self._invalidate(short_code)
+            if logger.isEnabledFor(logging.DEBUG):
+                if result:
+                    logger.debug("Successfully deleted short code: %s", short_code)
+                else:
+                    logger.debug("Short code not found for deletion: %s", short_code)
             return result
         except Exception as e:
-            logger.error(f"Error deleting short code {short_code}: {e}")
+            logger.error("Error deleting short code %s: %s", short_code, e)
             return False
     
     def deactivate(self, short_code: str) -> bool:
@@ -246,26 +480,38 @@ class URLShortener:
             
             url_obj.is_active = False
             self.storage.set(url_obj)  # Update the record
-            logger.debug(f"Deactivated short code: {short_code}")
-            return True
-            
         except Exception as e:
-            logger.error(f"Error deactivating short code {short_code}: {e}")
+            logger.error("Error deactivating short code %s: %s", short_code, e)
             return False
+        finally:
+            self._invalidate(short_code)
+        
+        logger.debug("Deactivated short code: %s", short_code)
+        return True
     
     def _generate_code(self, length: Optional[int] = None) -> str:
         """Generate a random short code using configured length"""
         code_length = length or self.config.default_code_length
-        alphabet = string.ascii_letters + string.digits
-        return ''.join(secrets.choice(alphabet) for _ in range(code_length))
+        # Over-read slightly so the ~3% rejected bytes almost never force a
+        # second urandom call (for 7 chars: fewer than 1 in 400 codes)
+        batch = code_length + (code_length >> 3) + 2
+        code = b""
+        while len(code) < code_length:
+            # One urandom read per batch, mapped through the table in C;
+            # bytes >= 248 are dropped so every character stays equally likely
+            code += secrets.token_bytes(batch).translate(_CODE_TABLE, _CODE_REJECT)
+        return code[:code_length].decode('ascii')
     
-    def _is_valid_url(self, url: str) -> bool:
-        """Basic URL validation - will enhance incrementally"""
-        try:
-            result = urlparse(url)
-            return all([result.scheme, result.netloc])
-        except Exception:
-            return False
+    def _generate_codes(self, count: int, length: Optional[int] = None) -> List[str]:
+        """Generate ``count`` random short codes from one batched random read"""
+        code_length = length or self.config.default_code_length
+        needed = count * code_length
+        batch = needed + (needed >> 3) + 2
+        pool = b""
+        while len(pool) < needed:
+            pool += secrets.token_bytes(batch).translate(_CODE_TABLE, _CODE_REJECT)
+        pool = pool.decode('ascii')
+        return [pool[i:i + code_length] for i in range(0, needed, code_length)]
     
     def get_stats(self) -> Dict[str, int]:
         """
@@ -274,17 +520,21 @@ class URLShortener:
         Returns:
             Dict with total_urls, active_urls, total_clicks
         """
-        return self.storage.get_stats()
+        return self.stats()
     
-    def get_all_urls(self) -> List[Dict[str, Any]]:
+    def get_all_urls(self, limit: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
         """
         Get all shortened URLs for table display
         
+        Args:
+            limit: Page size, or None for every URL
+            offset: Number of newest URLs to skip
+            
         Returns:
-            List of URL objects with selected fields for table
+            List of URL objects with selected fields for table, newest first
         """
         try:
-            return self.storage.get_all_urls()
+            return self.storage.get_all_urls(limit, offset)
         except Exception as e:
-            logger.error(f"Error getting all URLs: {e}")
+            logger.error("Error getting all URLs: %s", e)
             return [] 
\ No newline at end of file
@@ -1,20 +1,130 @@
 """Storage backend implementations for Talisik Short URL service"""
 
 from abc import ABC, abstractmethod
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Union
 from datetime import datetime, UTC
+import atexit
 import logging
+import os
+import threading
 import uuid
+import weakref
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import islice
 
 from .models import ShortURL
 from .config import TalisikConfig
+from .cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
+# Xata SQL, kept as constants so every call sends byte-identical statements
+_SQL_COLUMNS = "xata_id, original_url, short_code, created_at, expires_at, click_count, is_active"
+_SQL_GET = f"SELECT {_SQL_COLUMNS} FROM short_urls WHERE short_code = $1"
+_SQL_EXISTS = "SELECT 1 FROM short_urls WHERE short_code = $1 LIMIT 1"
+_SQL_CODES = "SELECT short_code FROM short_urls"
+_SQL_DELETE = "DELETE FROM short_urls WHERE short_code = $1 RETURNING xata_id"
+_SQL_STATS = (
+    "SELECT COUNT(*) as total_urls, SUM(CASE WHEN is_active THEN 1 ELSE 0 END) as active_urls, "
+    "SUM(click_count) as total_clicks FROM short_urls"
+)
+_SQL_LIST = (
+    "SELECT original_url, short_code, expires_at, click_count, is_active, created_at "
+    "FROM short_urls ORDER BY created_at DESC"
+)
+_SQL_LIST_PAGE = _SQL_LIST + " LIMIT $1 OFFSET $2"
+
+# Both writes take the same six parameters, expires_at being NULL when unset:
+# xata_id, original_url, short_code, expires_at, click_count, is_active.
+# Casts are needed because INSERT ... SELECT can't infer parameter types.
+
+# Conditional insert: the NOT EXISTS probe and the write are one statement
+_SQL_INSERT_IF_ABSENT = """
+    INSERT INTO short_urls (xata_id, original_url, short_code, expires_at, click_count, is_active)
+    SELECT $1::text, $2::text, $3::text, $4::timestamptz, $5::int, $6::boolean
+    WHERE NOT EXISTS (SELECT 1 FROM short_urls WHERE short_code = $3::text)
+    RETURNING xata_id
+"""
+# Upsert without relying on a unique index on short_code (ON CONFLICT
+# needs one). click_count is left alone on update: clicks are owned by
+# the write-behind counter.
+_SQL_UPSERT = """
+    WITH updated AS (
+        UPDATE short_urls
+        SET original_url = $2::text, expires_at = $4::timestamptz, is_active = $6::boolean
+        WHERE short_code = $3::text
+        RETURNING xata_id
+    ), inserted AS (
+        INSERT INTO short_urls (xata_id, original_url, short_code, expires_at, click_count, is_active)
+        SELECT $1::text, $2::text, $3::text, $4::timestamptz, $5::int, $6::boolean
+        WHERE NOT EXISTS (SELECT 1 FROM updated)
+        RETURNING xata_id
+    )
+    SELECT xata_id FROM updated
+    UNION ALL
+    SELECT xata_id FROM inserted
+"""
+
+
+@lru_cache(maxsize=None)
+def _sql_add_clicks(rows: int) -> str:
+    """Batched click flush for ``rows`` (code, increment) pairs - one string per batch size"""
+    values = ", ".join(f"(${2 * n + 1}::text, ${2 * n + 2}::int)" for n in range(rows))
+    return (
+        "UPDATE short_urls SET click_count = short_urls.click_count + v.inc "
+        f"FROM (VALUES {values}) AS v(code, inc) WHERE short_urls.short_code = v.code"
+    )
+
+
+# xata_ids are drawn from one urandom read per _UUID_POOL_SIZE inserts
+_UUID_POOL_SIZE = 256
+_uuid_pool: deque = deque()
+# A forked worker must not hand out ids its parent already pooled
+os.register_at_fork(after_in_child=_uuid_pool.clear)
+
+
+def _new_xata_id() -> str:
+    """Random (version 4) UUID string, served from a pooled urandom read"""
+    try:
+        return _uuid_pool.popleft()
+    except IndexError:
+        raw = os.urandom(16 * _UUID_POOL_SIZE)
+        _uuid_pool.extend(str(uuid.UUID(bytes=raw[i:i + 16], version=4)) for i in range(16, len(raw), 16))
+        return str(uuid.UUID(bytes=raw[:16], version=4))
+
+
+@lru_cache(maxsize=16384)
+def _parse_ts(value: str) -> datetime:
+    """Parse a stored ISO timestamp; rows are re-read often, so repeats are cached"""
+    # fromisoformat accepts a trailing "Z" natively since Python 3.11
+    return datetime.fromisoformat(value)
+
+
+def _is_redeemable(short_url: ShortURL, now: datetime) -> bool:
+    """A redirect counts as a click only for active, unexpired URLs"""
+    return short_url.is_active and not (short_url.expires_at and now > short_url.expires_at)
+
+
+# Live XataStorages, flushed by one atexit hook. A per-instance hook would
+# keep every instance (and its cache) alive until exit; an instance with
+# buffered clicks is still held by its armed flush timer until it flushes
+_xata_storages: "weakref.WeakSet[XataStorage]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_all_clicks() -> None:
+    for storage in list(_xata_storages):
+        storage.flush_clicks()
+
 
 class AbstractStorage(ABC):
     """Abstract base class for storage backends"""
     
+    # True if the backend generates ShortURL.id itself on insert
+    assigns_ids: bool = False
+    
     @abstractmethod
     def get(self, short_code: str) -> Optional[ShortURL]:
         """Retrieve a ShortURL by its short code"""
@@ -25,6 +135,36 @@ class AbstractStorage(ABC):
         """Store a ShortURL"""
         pass
     
+    def set_if_absent(self, short_url: ShortURL) -> bool:
+        """
+        Store a ShortURL only if its short code is free
+        
+        Returns True if stored, False if the code is already taken. Backends
+        override this with a single round-trip; this fallback probes first.
+        """
+        if self.exists(short_url.short_code):
+            return False
+        self.set(short_url)
+        return True
+    
+    def set_many_if_absent(self, short_urls: List[ShortURL]) -> List[Union[bool, Exception]]:
+        """
+        Bulk set_if_absent() - one result per ShortURL, in order
+        
+        Each result is True (stored), False (code taken) or the exception
+        that item's write raised, so one failure doesn't hide the rows that
+        were stored. Later entries reusing a code from earlier in the batch
+        get False. Backends override this to batch the round-trips.
+        """
+        return [self._try_set_if_absent(short_url) for short_url in short_urls]
+    
+    def _try_set_if_absent(self, short_url: ShortURL) -> Union[bool, Exception]:
+        """set_if_absent() with the error returned instead of raised"""
+        try:
+            return self.set_if_absent(short_url)
+        except Exception as e:
+            return e
+    
     @abstractmethod
     def delete(self, short_code: str) -> bool:
         """Delete a ShortURL by short code. Returns True if deleted, False if not found"""
@@ -40,15 +180,39 @@ class AbstractStorage(ABC):
         """Increment click count for a short code. Returns new count or None if not found"""
         pass
     
+    def get_and_increment(self, short_code: str, now: datetime) -> Optional[ShortURL]:
+        """
+        Fetch a ShortURL and count a click on it in one operation
+        
+        The click is only counted if the URL is active and unexpired at
+        ``now``; the returned record's click_count reflects it. Returns None
+        if not found. Backends override this with a single round-trip.
+        """
+        short_url = self.get(short_code)
+        if short_url and _is_redeemable(short_url, now):
+            new_count = self.update_click_count(short_code)
+            if new_count is not None:
+                short_url.click_count = new_count
+        return short_url
+    
     @abstractmethod
     def get_stats(self) -> Dict[str, int]:
         """Get basic statistics about stored URLs"""
         pass
     
     @abstractmethod
-    def get_all_urls(self) -> List[Dict[str, Any]]:
-        """Get all URLs for table display"""
+    def get_all_urls(self, limit: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
+        """Get URLs for table display, newest first (all of them when limit is None)"""
         pass
+    
+    def get_all_short_codes(self) -> List[str]:
+        """
+        Every stored short code, for warming in-process filters
+        
+        Unlike get_all_urls() this raises when the store can't be read, so
+        callers can tell an empty store from an unreachable one.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not list short codes")
 
 
 class MemoryStorage(AbstractStorage):
@@ -56,6 +220,9 @@ class MemoryStorage(AbstractStorage):
     
     def __init__(self):
         self._urls: Dict[str, ShortURL] = {}
+        # click_count += 1 is a read-modify-write and expand() runs on the
+        # API's threadpool, so concurrent clicks would otherwise be lost
+        self._clicks_lock = threading.Lock()
         logger.info("Initialized MemoryStorage backend")
     
     def get(self, short_code: str) -> Optional[ShortURL]:
@@ -63,12 +230,23 @@ class MemoryStorage(AbstractStorage):
     
     def set(self, short_url: ShortURL) -> None:
         self._urls[short_url.short_code] = short_url
-        logger.debug(f"Stored URL with short_code: {short_url.short_code}")
+        logger.debug("Stored URL with short_code: %s", short_url.short_code)
+    
+    def set_if_absent(self, short_url: ShortURL) -> bool:
+        # setdefault is a single atomic dict operation under the GIL
+        stored = self._urls.setdefault(short_url.short_code, short_url) is short_url
+        if stored:
+            logger.debug("Stored URL with short_code: %s", short_url.short_code)
+        return stored
+    
+    def set_many_if_absent(self, short_urls: List[ShortURL]) -> List[Union[bool, Exception]]:
+        setdefault = self._urls.setdefault
+        return [setdefault(short_url.short_code, short_url) is short_url for short_url in short_urls]
     
     def delete(self, short_code: str) -> bool:
         if short_code in self._urls:
             del self._urls[short_code]
-            logger.debug(f"Deleted URL with short_code: {short_code}")
+            logger.debug("Deleted URL with short_code: %s", short_code)
             return True
         return False
     
@@ -76,192 +254,317 @@ class MemoryStorage(AbstractStorage):
         return short_code in self._urls
     
     def update_click_count(self, short_code: str) -> Optional[int]:
-        if short_code in self._urls:
-            self._urls[short_code].click_count += 1
-            new_count = self._urls[short_code].click_count
-            logger.debug(f"Updated click count for {short_code}: {new_count}")
-            return new_count
-        return None
+        with self._clicks_lock:
+            short_url = self._urls.get(short_code)
+            if short_url is None:
+                return None
+            short_url.click_count += 1
+            click_count = short_url.click_count
+        logger.debug("Updated click count for %s: %s", short_code, click_count)
+        return click_count
+    
+    def get_and_increment(self, short_code: str, now: datetime) -> Optional[ShortURL]:
+        with self._clicks_lock:
+            short_url = self._urls.get(short_code)
+            if short_url and _is_redeemable(short_url, now):
+                short_url.click_count += 1
+        return short_url
     
     def get_stats(self) -> Dict[str, int]:
+        # One pass over the values; running counters would drift because
+        # callers mutate stored ShortURLs in place before calling set()
+        active = clicks = 0
+        for url_obj in self._urls.values():
+            active += url_obj.is_active
+            clicks += url_obj.click_count
         return {
             "total_urls": len(self._urls),
-            "active_urls": sum(1 for url in self._urls.values() if url.is_active),
-            "total_clicks": sum(url.click_count for url in self._urls.values())
+            "active_urls": active,
+            "total_clicks": clicks
         }
     
-    def get_all_urls(self) -> List[Dict[str, Any]]:
+    def get_all_urls(self, limit: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
         """Get all URLs for table display with specified columns"""
-        urls = []
-        for url_obj in self._urls.values():
-            urls.append({
+        stop = None if limit is None else offset + limit
+        # Dicts keep insertion order and codes are inserted as they are created,
+        # so walking backwards is already newest first - no sort needed
+        return [
+            {
                 "original_url": url_obj.original_url,
                 "short_code": url_obj.short_code,
                 "expires_at": url_obj.expires_at.isoformat() if url_obj.expires_at else None,
                 "click_count": url_obj.click_count,
                 "is_active": url_obj.is_active,
                 "created_at": url_obj.created_at.isoformat()
-            })
-        # Sort by created_at desc (newest first)
-        return sorted(urls, key=lambda x: x["created_at"], reverse=True)
+            }
+            for url_obj in islice(reversed(self._urls.values()), offset, stop)
+        ]
+    
+    def get_all_short_codes(self) -> List[str]:
+        return list(self._urls)
 
 
 class XataStorage(AbstractStorage):
     """Xata.io storage implementation - production ready"""
     
+    assigns_ids = True  # xata_id is generated on insert
+    
+    # Read-through cache for get(); the TTL bounds staleness from other writers.
+    # The API's expand cache (30s) stacks on top, so redirects lag by <= 60s.
+    _CACHE_SIZE = 10_000
+    _CACHE_TTL = 30
+    
+    # Write-behind click buffer: flushed every interval, or early once this
+    # many codes are pending; each UPDATE carries at most _FLUSH_BATCH rows
+    _FLUSH_INTERVAL = 2.0
+    _FLUSH_THRESHOLD = 500
+    _FLUSH_BATCH = 500
+    
+    # Concurrent inserts per set_many_if_absent() call
+    _MAX_PARALLEL_WRITES = 8
+    
     def __init__(self, config: TalisikConfig):
         self.config = config
         self._client = None
+        self._client_lock = threading.Lock()
         self._table_name = "short_urls"
-        logger.info(f"Initialized XataStorage backend for database: {config.xata_database_url}")
+        self._get_cache = TTLCache(maxsize=self._CACHE_SIZE, ttl=self._CACHE_TTL)
+        self._pending_clicks: Dict[str, int] = defaultdict(int)
+        self._clicks_lock = threading.Lock()
+        self._flush_timer: Optional[threading.Timer] = None
+        _xata_storages.add(self)
+        logger.info("Initialized XataStorage backend for database: %s", config.xata_database_url)
     
     @property
     def client(self):
         """Lazy initialization of Xata client"""
         if self._client is None:
-            try:
-                from xata import XataClient
-                # Initialize with API key and database URL
-                self._client = XataClient(
-                    api_key=self.config.xata_api_key,
-                    db_url=self.config.xata_database_url
-                )
-                logger.info("Xata client initialized successfully")
-            except ImportError:
-                raise ImportError("xata package not installed. Run: pip install xata")
-            except Exception as e:
-                logger.error(f"Failed to initialize Xata client: {e}")
-                raise
+            # Threadpool requests and set_many_if_absent() workers can arrive
+            # together; only the first builds the client, the rest reuse it
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._create_client()
         return self._client
     
+    def _create_client(self):
+        try:
+            from xata import XataClient
+            # Initialize with API key and database URL
+            client = XataClient(
+                api_key=self.config.xata_api_key,
+                db_url=self.config.xata_database_url
+            )
+            logger.info("Xata client initialized successfully")
+            return client
+        except ImportError:
+            raise ImportError("xata package not installed. Run: pip install xata")
+        except Exception as e:
+            logger.error("Failed to initialize Xata client: %s", e)
+            raise
+    
     def get(self, short_code: str) -> Optional[ShortURL]:
-        """Retrieve a ShortURL by its short code using SQL"""
+        """Retrieve a ShortURL by its short code using SQL (cached)"""
+        cached = self._get_cache.get(short_code)
+        if cached is not None:
+            return cached
+        
         try:
             # Use SQL query - this works with manually created tables
-            result = self.client.sql().query(
-                "SELECT * FROM short_urls WHERE short_code = $1",
-                [short_code]
-            )
+            result = self.client.sql().query(_SQL_GET, [short_code])
             
             if result and result.get('records') and len(result['records']) > 0:
                 record = result['records'][0]
-                return self._record_to_short_url(record)
+                short_url = self._record_to_short_url(record)
+                with self._clicks_lock:
+                    # Clicks still in the write-behind buffer aren't in the row yet
+                    short_url.click_count += self._pending_clicks.get(short_code, 0)
+                self._get_cache.set(short_code, short_url)
+                return short_url
             
             return None
             
         except Exception as e:
-            logger.error(f"Error retrieving URL with short_code {short_code}: {e}")
+            logger.error("Error retrieving URL with short_code %s: %s", short_code, e)
             return None
     
     def set(self, short_url: ShortURL) -> None:
-        """Store a ShortURL in Xata using SQL with explicit xata_id"""
+        """Insert or update a ShortURL in Xata using SQL with explicit xata_id"""
         try:
-            # Generate explicit xata_id since Xata requires it
-            xata_id = str(uuid.uuid4())
-            
-            # Provide explicit xata_id and all required fields
-            if short_url.expires_at:
-                sql = """
-                    INSERT INTO short_urls (xata_id, original_url, short_code, expires_at, click_count, is_active)
-                    VALUES ($1, $2, $3, $4, $5, $6)
-                    RETURNING xata_id
-                """
-                params = [
-                    xata_id,
-                    short_url.original_url,
-                    short_url.short_code,
-                    short_url.expires_at.isoformat(),
-                    short_url.click_count,
-                    short_url.is_active
-                ]
-            else:
-                sql = """
-                    INSERT INTO short_urls (xata_id, original_url, short_code, click_count, is_active)
-                    VALUES ($1, $2, $3, $4, $5)
-                    RETURNING xata_id
-                """
-                params = [
-                    xata_id,
-                    short_url.original_url,
-                    short_url.short_code,
-                    short_url.click_count,
-                    short_url.is_active
-                ]
+            sql = _SQL_UPSERT
+            params = self._write_params(short_url)
             
-            logger.debug(f"Inserting record with explicit xata_id: {sql}")
-            logger.debug(f"Parameters: {params}")
+            debug = logger.isEnabledFor(logging.DEBUG)
+            if debug:
+                logger.debug("Upserting record with explicit xata_id: %s", sql)
+                logger.debug("Parameters: %s", params)
             
             result = self.client.sql().query(sql, params)
-            logger.debug(f"SQL Insert result: {result}")
+            if debug:
+                logger.debug("SQL Upsert result: %s", result)
             
-            # Check if insert was successful
+            # Check if the upsert was successful
             if result and result.get('records') and len(result['records']) > 0:
                 record = result['records'][0]
+                self._get_cache.pop(short_url.short_code)
                 if record.get('xata_id'):
                     short_url.id = record['xata_id']
-                    logger.debug(f"Successfully stored URL with short_code: {short_url.short_code}, xata_id: {record['xata_id']}")
+                    logger.debug("Successfully stored URL with short_code: %s, xata_id: %s", short_url.short_code, record['xata_id'])
                 else:
-                    logger.warning(f"Insert succeeded but no xata_id returned: {result}")
+                    logger.warning("Upsert succeeded but no xata_id returned: %s", result)
             else:
-                logger.error(f"SQL Insert failed: {result}")
-                raise Exception(f"SQL Insert failed: {result}")
+                logger.error("SQL Upsert failed: %s", result)
+                raise Exception(f"SQL Upsert failed: {result}")
                 
         except Exception as e:
-            logger.error(f"Error storing URL with short_code {short_url.short_code}: {e}")
+            # Callers mutate the cached object before set(); don't keep a change the DB never got
+            self._get_cache.pop(short_url.short_code)
+            logger.error("Error storing URL with short_code %s: %s", short_url.short_code, e)
             raise
     
+    def set_if_absent(self, short_url: ShortURL) -> bool:
+        """Insert a ShortURL unless its short code exists, in one SQL round-trip"""
+        try:
+            result = self.client.sql().query(_SQL_INSERT_IF_ABSENT, self._write_params(short_url))
+            
+            # No returned row means the WHERE NOT EXISTS guard rejected the insert
+            if not (result and result.get('records')):
+                logger.debug("Short code already exists: %s", short_url.short_code)
+                return False
+            
+            short_url.id = result['records'][0].get('xata_id', short_url.id)
+            self._get_cache.set(short_url.short_code, short_url)
+            logger.debug("Successfully stored URL with short_code: %s", short_url.short_code)
+            return True
+            
+        except Exception as e:
+            logger.error("Error storing URL with short_code %s: %s", short_url.short_code, e)
+            raise
+    
+    def set_many_if_absent(self, short_urls: List[ShortURL]) -> List[Union[bool, Exception]]:
+        """Bulk set_if_absent() with the independent inserts overlapped on the wire"""
+        # Only the first ShortURL per code is attempted, so repeats within the
+        # batch lose deterministically instead of racing the earlier entry
+        first: Dict[str, int] = {}
+        for index, short_url in enumerate(short_urls):
+            first.setdefault(short_url.short_code, index)
+        if len(first) <= 1:
+            return super().set_many_if_absent(short_urls)
+        
+        results: List[Union[bool, Exception]] = [False] * len(short_urls)
+        indexes = list(first.values())
+        with ThreadPoolExecutor(max_workers=min(self._MAX_PARALLEL_WRITES, len(indexes))) as pool:
+            stored = pool.map(self._try_set_if_absent, [short_urls[index] for index in indexes])
+            for index, ok in zip(indexes, stored):
+                results[index] = ok
+        return results
+    
     def delete(self, short_code: str) -> bool:
         """Delete a ShortURL by short code using SQL"""
+        self._get_cache.pop(short_code)
+        with self._clicks_lock:
+            self._pending_clicks.pop(short_code, None)
         try:
             # Use SQL DELETE - this works with manually created tables
-            result = self.client.sql().query(
-                "DELETE FROM short_urls WHERE short_code = $1 RETURNING xata_id",
-                [short_code]
-            )
+            result = self.client.sql().query(_SQL_DELETE, [short_code])
             
             if result and result.get('records') and len(result['records']) > 0:
-                logger.debug(f"Successfully deleted URL with short_code: {short_code}")
+                logger.debug("Successfully deleted URL with short_code: %s", short_code)
                 return True
             else:
-                logger.debug(f"No URL found to delete with short_code: {short_code}")
+                logger.debug("No URL found to delete with short_code: %s", short_code)
                 return False
                 
         except Exception as e:
-            logger.error(f"Error deleting URL with short_code {short_code}: {e}")
+            logger.error("Error deleting URL with short_code %s: %s", short_code, e)
             return False
     
     def exists(self, short_code: str) -> bool:
-        """Check if a short code already exists"""
-        return self.get(short_code) is not None
+        """Check if a short code already exists (cache, then a 1-column probe)"""
+        if short_code in self._get_cache:
+            return True
+        
+        result = self.client.sql().query(_SQL_EXISTS, [short_code])
+        return bool(result and result.get('records'))
     
     def update_click_count(self, short_code: str) -> Optional[int]:
-        """Increment click count for a short code using SQL"""
-        try:
-            # Use SQL UPDATE - this works with manually created tables
-            result = self.client.sql().query(
-                "UPDATE short_urls SET click_count = click_count + 1 WHERE short_code = $1 RETURNING click_count",
-                [short_code]
-            )
-            
-            if result and result.get('records') and len(result['records']) > 0:
-                new_count = result['records'][0]['click_count']
-                logger.debug(f"Updated click count for {short_code}: {new_count}")
-                return new_count
-            else:
-                logger.debug(f"No URL found to update click count for short_code: {short_code}")
-                return None
-                
-        except Exception as e:
-            logger.error(f"Error updating click count for {short_code}: {e}")
+        """Count a click through the write-behind buffer (no SQL on cache hits)"""
+        short_url = self.get(short_code)
+        if short_url is None:
+            logger.debug("No URL found to update click count for short_code: %s", short_code)
             return None
+        
+        new_count = self._buffer_click(short_url)
+        logger.debug("Updated click count for %s: %s", short_code, new_count)
+        return new_count
+    
+    def get_and_increment(self, short_code: str, now: datetime) -> Optional[ShortURL]:
+        """Fetch a ShortURL (cached) and buffer a redeemable click"""
+        short_url = self.get(short_code)
+        if short_url and _is_redeemable(short_url, now):
+            self._buffer_click(short_url)
+        return short_url
+    
+    def _buffer_click(self, short_url: ShortURL) -> int:
+        """Record one click in memory and schedule a flush; returns the new count"""
+        with self._clicks_lock:
+            self._pending_clicks[short_url.short_code] += 1
+            short_url.click_count += 1
+            new_count = short_url.click_count
+            pending = len(self._pending_clicks)
+            if pending < self._FLUSH_THRESHOLD:
+                self._schedule_flush()
+        
+        if pending >= self._FLUSH_THRESHOLD:
+            self.flush_clicks()
+        return new_count
+    
+    def close(self) -> None:
+        """Flush buffered clicks and drop out of the exit-time flush"""
+        self.flush_clicks()
+        with self._clicks_lock:
+            if self._flush_timer is not None:  # re-armed by a failed flush
+                self._flush_timer.cancel()
+                self._flush_timer = None
+        _xata_storages.discard(self)
+    
+    def _schedule_flush(self) -> None:
+        """Arm the flush timer unless one is pending (caller holds _clicks_lock)"""
+        if self._flush_timer is None:
+            self._flush_timer = threading.Timer(self._FLUSH_INTERVAL, self.flush_clicks)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+    
+    def flush_clicks(self) -> None:
+        """Write all buffered click increments to Xata, one UPDATE per batch"""
+        with self._clicks_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._pending_clicks:
+                return
+            pending = list(self._pending_clicks.items())
+            self._pending_clicks.clear()
+        
+        for start in range(0, len(pending), self._FLUSH_BATCH):
+            batch = pending[start:start + self._FLUSH_BATCH]
+            params: List[Any] = []
+            for code, increment in batch:
+                params += (code, increment)
+            try:
+                self.client.sql().query(_sql_add_clicks(len(batch)), params)
+            except Exception as e:
+                logger.error("Error flushing %s click counts, will retry: %s", len(batch), e)
+                with self._clicks_lock:
+                    for code, increment in batch:
+                        self._pending_clicks[code] += increment
+                    self._schedule_flush()  # Retry even if no further clicks arrive
     
     def get_stats(self) -> Dict[str, int]:
         """Get basic statistics about stored URLs using SQL"""
+        self.flush_clicks()  # Totals should include buffered clicks
         try:
             # Use SQL to get stats - this works with manually created tables
-            result = self.client.sql().query(
-                "SELECT COUNT(*) as total_urls, SUM(CASE WHEN is_active THEN 1 ELSE 0 END) as active_urls, SUM(click_count) as total_clicks FROM short_urls"
-            )
+            result = self.client.sql().query(_SQL_STATS)
             
             if result and result.get("records") and len(result["records"]) > 0:
                 stats = result["records"][0]
@@ -274,36 +577,53 @@ class XataStorage(AbstractStorage):
             return {"total_urls": 0, "active_urls": 0, "total_clicks": 0}
             
         except Exception as e:
-            logger.error(f"Error getting stats: {e}")
+            logger.error("Error getting stats: %s", e)
             return {"total_urls": 0, "active_urls": 0, "total_clicks": 0}
     
-    def get_all_urls(self) -> List[Dict[str, Any]]:
+    def get_all_urls(self, limit: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
         """Get all URLs for table display with specified columns"""
+        self.flush_clicks()
         try:
             # Use SQL to get all URLs with only the required columns
-            result = self.client.sql().query(
-                "SELECT original_url, short_code, expires_at, click_count, is_active, created_at FROM short_urls ORDER BY created_at DESC"
-            )
+            if limit is None and not offset:
+                result = self.client.sql().query(_SQL_LIST)
+            else:
+                # Postgres treats LIMIT NULL as no limit
+                result = self.client.sql().query(_SQL_LIST_PAGE, [limit, offset])
             
             if result and result.get("records"):
-                urls = []
-                for record in result["records"]:
-                    urls.append({
-                        "original_url": record["original_url"],
-                        "short_code": record["short_code"],
-                        "expires_at": record["expires_at"],
-                        "click_count": record.get("click_count", 0),
-                        "is_active": record.get("is_active", True),
-                        "created_at": record["created_at"]
-                    })
+                # Rows already carry exactly the _SQL_LIST columns, so hand the
+                # decoded dicts through instead of copying each into a new one
+                urls = result["records"]
+                for record in urls:
+                    record.setdefault("click_count", 0)
+                    record.setdefault("is_active", True)
                 return urls
             
             return []
             
         except Exception as e:
-            logger.error(f"Error getting all URLs: {e}")
+            logger.error("Error getting all URLs: %s", e)
             return []
     
+    def get_all_short_codes(self) -> List[str]:
+        result = self.client.sql().query(_SQL_CODES)
+        # An error response has no "records" key; an empty table has an empty list
+        if not result or "records" not in result:
+            raise RuntimeError(f"Listing short codes failed: {result}")
+        return [record["short_code"] for record in result["records"]]
+    
+    def _write_params(self, short_url: ShortURL) -> List[Any]:
+        """Parameters for _SQL_INSERT_IF_ABSENT / _SQL_UPSERT"""
+        return [
+            _new_xata_id(),  # Generate explicit xata_id since Xata requires it
+            short_url.original_url,
+            short_url.short_code,
+            short_url.expires_at.isoformat() if short_url.expires_at else None,
+            short_url.click_count,
+            short_url.is_active
+        ]
+    
     def _record_to_short_url(self, record: Dict) -> ShortURL:
         """Convert SQL query result to ShortURL object"""
         # SQL queries return records with 'xata_id' field
@@ -313,8 +633,8 @@ class XataStorage(AbstractStorage):
             id=record_id,
             original_url=record["original_url"],
             short_code=record["short_code"],
-            created_at=datetime.fromisoformat(record["created_at"].replace("Z", "+00:00")),
-            expires_at=datetime.fromisoformat(record["expires_at"].replace("Z", "+00:00")) if record.get("expires_at") else None,
+            created_at=_parse_ts(record["created_at"]),
+            expires_at=_parse_ts(record["expires_at"]) if record.get("expires_at") else None,
             click_count=record.get("click_count", 0),
             is_active=record.get("is_active", True)
         )
@@ -335,10 +655,273 @@ class XataStorage(AbstractStorage):
         return record
 
 
+class RedisStorage(AbstractStorage):
+    """Redis storage implementation - shared state for multi-worker deployments
+
+    Each URL is a hash at ``talisik:url:{code}``; a sorted set scored by
+    creation time indexes codes for stats and table listing.
+    """
+    
+    _KEY_PREFIX = "talisik:url:"
+    _INDEX_KEY = "talisik:urls"
+    
+    # HINCRBY alone would create a stray hash for unknown codes
+    _INCR_IF_EXISTS = """
+        if redis.call('EXISTS', KEYS[1]) == 1 then
+            return redis.call('HINCRBY', KEYS[1], 'click_count', 1)
+        end
+        return false
+    """
+    
+    # KEYS: hash, index; ARGV: created_at score, code, then field/value pairs
+    _SET_IF_ABSENT = """
+        if redis.call('EXISTS', KEYS[1]) == 1 then
+            return 0
+        end
+        redis.call('HSET', KEYS[1], unpack(ARGV, 3))
+        redis.call('ZADD', KEYS[2], ARGV[1], ARGV[2])
+        return 1
+    """
+    
+    # Returns the hash as a flat field/value list, with click_count already
+    # bumped when the URL is active and unexpired at ARGV[1] (epoch seconds)
+    _GET_AND_INCR = """
+        local h = redis.call('HGETALL', KEYS[1])
+        if #h == 0 then
+            return false
+        end
+        local rec = {}
+        for i = 1, #h, 2 do
+            rec[h[i]] = i + 1
+        end
+        local expires_ts = rec['expires_ts'] and tonumber(h[rec['expires_ts']])
+        local active = rec['is_active'] and h[rec['is_active']] == '1'
+        if active and not (expires_ts and tonumber(ARGV[1]) > expires_ts) then
+            local count = redis.call('HINCRBY', KEYS[1], 'click_count', 1)
+            if rec['click_count'] then
+                h[rec['click_count']] = tostring(count)
+            else
+                table.insert(h, 'click_count')
+                table.insert(h, tostring(count))
+            end
+        end
+        return h
+    """
+    
+    def __init__(self, config: TalisikConfig):
+        self.config = config
+        self._client = None
+        self._incr_script = None
+        self._set_if_absent_script = None
+        self._get_and_incr_script = None
+        logger.info("Initialized RedisStorage backend")
+    
+    @property
+    def client(self):
+        """Lazy initialization of pooled Redis client"""
+        if self._client is None:
+            try:
+                import redis
+                pool = redis.ConnectionPool.from_url(
+                    self.config.redis_url,
+                    max_connections=50,
+                    decode_responses=True
+                )
+                self._client = redis.Redis(connection_pool=pool)
+                self._incr_script = self._client.register_script(self._INCR_IF_EXISTS)
+                self._set_if_absent_script = self._client.register_script(self._SET_IF_ABSENT)
+                self._get_and_incr_script = self._client.register_script(self._GET_AND_INCR)
+                logger.info("Redis client initialized successfully")
+            except ImportError:
+                raise ImportError("redis package not installed. Run: pip install redis")
+            except Exception as e:
+                logger.error("Failed to initialize Redis client: %s", e)
+                raise
+        return self._client
+    
+    def _key(self, short_code: str) -> str:
+        return self._KEY_PREFIX + short_code
+    
+    def get(self, short_code: str) -> Optional[ShortURL]:
+        try:
+            record = self.client.hgetall(self._key(short_code))
+            return self._hash_to_short_url(record) if record else None
+        except Exception as e:
+            logger.error("Error retrieving URL with short_code %s: %s", short_code, e)
+            return None
+    
+    def set(self, short_url: ShortURL) -> None:
+        try:
+            pipe = self.client.pipeline()
+            pipe.hset(self._key(short_url.short_code), mapping=self._short_url_to_hash(short_url))
+            pipe.zadd(self._INDEX_KEY, {short_url.short_code: short_url.created_at.timestamp()})
+            pipe.execute()
+            logger.debug("Stored URL with short_code: %s", short_url.short_code)
+        except Exception as e:
+            logger.error("Error storing URL with short_code %s: %s", short_url.short_code, e)
+            raise
+    
+    def set_if_absent(self, short_url: ShortURL) -> bool:
+        """Atomically create the hash and index entry unless the code exists"""
+        try:
+            client = self.client  # Also registers the script
+            stored = self._set_if_absent_script(
+                keys=[self._key(short_url.short_code), self._INDEX_KEY],
+                args=self._set_if_absent_args(short_url),
+                client=client
+            )
+            if stored:
+                logger.debug("Stored URL with short_code: %s", short_url.short_code)
+            return bool(stored)
+        except Exception as e:
+            logger.error("Error storing URL with short_code %s: %s", short_url.short_code, e)
+            raise
+    
+    def set_many_if_absent(self, short_urls: List[ShortURL]) -> List[Union[bool, Exception]]:
+        """Run the set-if-absent script for every ShortURL in one pipeline"""
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for short_url in short_urls:
+                self._set_if_absent_script(
+                    keys=[self._key(short_url.short_code), self._INDEX_KEY],
+                    args=self._set_if_absent_args(short_url),
+                    client=pipe
+                )
+            # Per-command errors come back in place instead of aborting the batch
+            return [
+                stored if isinstance(stored, Exception) else bool(stored)
+                for stored in pipe.execute(raise_on_error=False)
+            ]
+        except Exception as e:
+            logger.error("Error storing batch of %s URLs: %s", len(short_urls), e)
+            raise
+    
+    def delete(self, short_code: str) -> bool:
+        try:
+            pipe = self.client.pipeline()
+            pipe.delete(self._key(short_code))
+            pipe.zrem(self._INDEX_KEY, short_code)
+            deleted, _ = pipe.execute()
+            return bool(deleted)
+        except Exception as e:
+            logger.error("Error deleting URL with short_code %s: %s", short_code, e)
+            return False
+    
+    def exists(self, short_code: str) -> bool:
+        return bool(self.client.exists(self._key(short_code)))
+    
+    def update_click_count(self, short_code: str) -> Optional[int]:
+        """Atomically increment click count in a single round-trip"""
+        try:
+            client = self.client  # Also registers the increment script
+            new_count = self._incr_script(keys=[self._key(short_code)], client=client)
+            return int(new_count) if new_count is not None else None
+        except Exception as e:
+            logger.error("Error updating click count for %s: %s", short_code, e)
+            return None
+    
+    def get_and_increment(self, short_code: str, now: datetime) -> Optional[ShortURL]:
+        """Fetch the hash and count a redeemable click in a single script call"""
+        try:
+            client = self.client  # Also registers the script
+            flat = self._get_and_incr_script(
+                keys=[self._key(short_code)],
+                args=[now.timestamp()],
+                client=client
+            )
+            if not flat:
+                return None
+            return self._hash_to_short_url(dict(zip(flat[::2], flat[1::2])))
+        except Exception as e:
+            logger.error("Error retrieving URL with short_code %s: %s", short_code, e)
+            return None
+    
+    def get_stats(self) -> Dict[str, int]:
+        try:
+            codes = self.client.zrange(self._INDEX_KEY, 0, -1)
+            pipe = self.client.pipeline()
+            for code in codes:
+                pipe.hmget(self._key(code), "is_active", "click_count")
+            active = clicks = 0
+            for is_active, click_count in pipe.execute():
+                active += is_active == "1"
+                clicks += int(click_count or 0)
+            return {"total_urls": len(codes), "active_urls": active, "total_clicks": clicks}
+        except Exception as e:
+            logger.error("Error getting stats: %s", e)
+            return {"total_urls": 0, "active_urls": 0, "total_clicks": 0}
+    
+    def get_all_urls(self, limit: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
+        """Get all URLs for table display, newest first"""
+        if limit is not None and limit <= 0:
+            return []
+        end = -1 if limit is None else offset + limit - 1
+        try:
+            codes = self.client.zrevrange(self._INDEX_KEY, offset, end)
+            pipe = self.client.pipeline()
+            for code in codes:
+                pipe.hgetall(self._key(code))
+            urls = []
+            for record in pipe.execute():
+                if not record:
+                    continue
+                urls.append({
+                    "original_url": record["original_url"],
+                    "short_code": record["short_code"],
+                    "expires_at": record.get("expires_at") or None,
+                    "click_count": int(record.get("click_count", 0)),
+                    "is_active": record.get("is_active") == "1",
+                    "created_at": record["created_at"]
+                })
+            return urls
+        except Exception as e:
+            logger.error("Error getting all URLs: %s", e)
+            return []
+    
+    def get_all_short_codes(self) -> List[str]:
+        return self.client.zrange(self._INDEX_KEY, 0, -1)
+    
+    def _set_if_absent_args(self, short_url: ShortURL) -> List[Any]:
+        """ARGV for _SET_IF_ABSENT: score, code, then the flattened hash"""
+        args: List[Any] = [short_url.created_at.timestamp(), short_url.short_code]
+        for field, value in self._short_url_to_hash(short_url).items():
+            args += (field, value)
+        return args
+    
+    def _hash_to_short_url(self, record: Dict[str, str]) -> ShortURL:
+        """Convert a Redis hash (all string values) to a ShortURL"""
+        expires_at = record.get("expires_at")
+        return ShortURL(
+            id=record.get("id", ""),
+            original_url=record["original_url"],
+            short_code=record["short_code"],
+            created_at=_parse_ts(record["created_at"]),
+            expires_at=_parse_ts(expires_at) if expires_at else None,
+            click_count=int(record.get("click_count", 0)),
+            is_active=record.get("is_active") == "1"
+        )
+    
+    def _short_url_to_hash(self, short_url: ShortURL) -> Dict[str, str]:
+        """Convert a ShortURL to a flat Redis hash"""
+        return {
+            "id": short_url.id,
+            "original_url": short_url.original_url,
+            "short_code": short_url.short_code,
+            "created_at": short_url.created_at.isoformat(),
+            "expires_at": short_url.expires_at.isoformat() if short_url.expires_at else "",
+            # Numeric copy of expires_at so Lua scripts can compare against now
+            "expires_ts": repr(short_url.expires_at.timestamp()) if short_url.expires_at else "",
+            "click_count": str(short_url.click_count),
+            "is_active": "1" if short_url.is_active else "0"
+        }
+
+
 def create_storage(config: TalisikConfig) -> AbstractStorage:
     """Factory function to create storage backend based on configuration"""
     if config.storage_backend == "xata":
         return XataStorage(config)
+    elif config.storage_backend == "redis":
+        return RedisStorage(config)
     elif config.storage_backend == "memory":
         return MemoryStorage()
     else:
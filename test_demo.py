@@ -36,8 +36,9 @@ def main():
     urls = ['https://stackoverflow.com', 'https://python.org', 'https://fastapi.tiangolo.com']
     shortened_urls = []
     
-    for url in urls:
-        result = shortener.shorten(ShortenRequest(url))
+    # One batch call: codes are generated together and stored in one storage round-trip
+    results = shortener.shorten_many([ShortenRequest(url) for url in urls])
+    for url, result in zip(urls, results):
         shortened_urls.append((url, result.short_code, result.short_url))
         print(f"{url} → {result.short_code}")
     
@@ -57,7 +58,7 @@ def main():
     print(f"Expandable:   {shortener.expand(result3.short_code) is not None}")
     
     print("\n🎉 All tests completed successfully!")
-    print(f"📊 Total URLs shortened: {len(shortener._urls)}")
+    print(f"📊 Total URLs shortened: {shortener.get_stats()['total_urls']}")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
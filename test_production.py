@@ -13,10 +13,32 @@ import sys
 import asyncio
 import aiohttp
 import json
+import orjson
+from dataclasses import dataclass, fields
 from typing import Dict, Any, Optional
 from datetime import datetime
 import time
 
+# ANSI colours per test status (anything else is shown in yellow)
+_COLORS = {"PASS": "\033[92m", "FAIL": "\033[91m"}
+_WARN = "\033[93m"
+_RESET = "\033[0m"
+
+# Request bodies are sent pre-encoded with orjson rather than via json=
+_INVALID_URL_BODY = orjson.dumps({"url": "not-a-valid-url"})
+
+
+@dataclass(slots=True)
+class UrlInfo:
+    """The /info fields the suite reads, parsed once per response"""
+    short_code: str
+    original_url: str
+    created_at: str
+    click_count: int
+
+
+_URL_INFO_FIELDS = tuple(f.name for f in fields(UrlInfo))
+
 
 class ProductionTester:
     """Comprehensive production testing suite"""
@@ -26,9 +48,19 @@ class ProductionTester:
         self.session: Optional[aiohttp.ClientSession] = None
         self.test_results = []
         self.created_urls = []  # Track created URLs for cleanup
+        self._buf = []  # Console lines, written once per phase by flush()
         
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
+        # Every request targets one host, so keep a small pool of warm
+        # keep-alive connections and pay the TLS handshake once
+        connector = aiohttp.TCPConnector(
+            limit=20,
+            limit_per_host=10,
+            keepalive_timeout=30,
+            ttl_dns_cache=300,
+            enable_cleanup_closed=True,
+        )
+        self.session = aiohttp.ClientSession(connector=connector)
         return self
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
@@ -41,24 +73,29 @@ class ProductionTester:
             "test": test_name,
             "status": status,
             "details": details,
-            "timestamp": datetime.now().isoformat()
+            # Only failures are reported with a time, so passes skip the clock read
+            "timestamp": time.time_ns() if status == "FAIL" else None
         }
         self.test_results.append(result)
         
         # Color coding for console output
-        color = "\033[92m" if status == "PASS" else "\033[91m" if status == "FAIL" else "\033[93m"
-        reset = "\033[0m"
-        
-        print(f"{color}[{status}]{reset} {test_name}")
+        color = _COLORS.get(status, _WARN)
+        self._buf.append(f"{color}[{status}]{_RESET} {test_name}")
         if details:
-            print(f"      {details}")
+            self._buf.append(f"      {details}")
+    
+    def flush(self):
+        """Write buffered console lines in a single call"""
+        if self._buf:
+            sys.stdout.write("\n".join(self._buf) + "\n")
+            self._buf.clear()
     
     async def test_health_check(self):
         """Test basic API health and availability"""
         try:
             async with self.session.get(f"{self.base_url}/") as response:
                 if response.status == 200:
-                    data = await response.json()
+                    data = orjson.loads(await response.read())
                     self.log_test("Health Check", "PASS", f"API accessible, response: {data}")
                     return True
                 else:
@@ -77,12 +114,12 @@ class ProductionTester:
         try:
             async with self.session.post(
                 f"{self.base_url}/shorten",
-                json=payload,
+                data=orjson.dumps(payload),
                 headers={"Content-Type": "application/json"}
             ) as response:
                 
                 if response.status == 200:
-                    data = await response.json()
+                    data = orjson.loads(await response.read())
                     short_code = data.get("short_code")
                     short_url = data.get("short_url")
                     
@@ -134,14 +171,14 @@ class ProductionTester:
             async with self.session.get(f"{self.base_url}/info/{short_code}") as response:
                 
                 if response.status == 200:
-                    data = await response.json()
-                    required_fields = ["short_code", "original_url", "created_at", "click_count"]
+                    data = orjson.loads(await response.read())
                     
-                    if all(field in data for field in required_fields):
-                        self.log_test("Get URL Info", "PASS", f"Clicks: {data['click_count']}")
-                        return data
+                    if all(field in data for field in _URL_INFO_FIELDS):
+                        info = UrlInfo(**{field: data[field] for field in _URL_INFO_FIELDS})
+                        self.log_test("Get URL Info", "PASS", f"Clicks: {info.click_count}")
+                        return info
                     else:
-                        missing = [f for f in required_fields if f not in data]
+                        missing = [f for f in _URL_INFO_FIELDS if f not in data]
                         self.log_test("Get URL Info", "FAIL", f"Missing fields: {missing}")
                         return None
                 else:
@@ -159,7 +196,7 @@ class ProductionTester:
             async with self.session.get(f"{self.base_url}/api/stats") as response:
                 
                 if response.status == 200:
-                    data = await response.json()
+                    data = orjson.loads(await response.read())
                     required_fields = ["total_urls", "total_clicks"]
                     
                     if all(field in data for field in required_fields):
@@ -178,38 +215,50 @@ class ProductionTester:
             self.log_test("API Stats", "FAIL", f"Request error: {str(e)}")
             return None
     
-    async def test_click_tracking(self, short_code: str):
-        """Test click tracking by making multiple requests"""
+    async def _fetch_click_count(self, short_code: str) -> Optional[int]:
+        """Current click count from /info, without logging a test result"""
+        async with self.session.get(f"{self.base_url}/info/{short_code}") as response:
+            if response.status != 200:
+                return None
+            return orjson.loads(await response.read()).get("click_count", 0)
+    
+    async def test_click_tracking(self, short_code: str, clicks: int = 10, initial_clicks: Optional[int] = None):
+        """Test click tracking with a burst of concurrent redirects"""
         try:
-            # Get initial click count
-            info_before = await self.test_get_info(short_code)
-            if not info_before:
+            # Start from the count test_get_info already read, when given
+            if initial_clicks is None:
+                initial_clicks = await self._fetch_click_count(short_code)
+            if initial_clicks is None:
+                self.log_test("Click Tracking", "FAIL", "Could not read initial click count")
                 return False
-                
-            initial_clicks = info_before.get("click_count", 0)
             
-            # Make a redirect request (should increment clicks)
-            async with self.session.get(
-                f"{self.base_url}/{short_code}",
-                allow_redirects=True
-            ) as response:
-                pass  # We just want to trigger the click
+            # Fire the redirects together; each should count exactly one click
+            async def click():
+                async with self.session.get(
+                    f"{self.base_url}/{short_code}",
+                    allow_redirects=False
+                ) as response:
+                    await response.release()
             
-            # Wait a moment for the click to be recorded
-            await asyncio.sleep(1)
+            await asyncio.gather(*(click() for _ in range(clicks)))
             
-            # Get updated click count
-            info_after = await self.test_get_info(short_code)
-            if not info_after:
-                return False
-                
-            final_clicks = info_after.get("click_count", 0)
+            # Poll with backoff until the clicks are visible (~3s at most)
+            final_clicks = initial_clicks
+            delay = 0.05
+            while delay < 2:
+                current = await self._fetch_click_count(short_code)
+                if current is not None:
+                    final_clicks = current
+                if final_clicks - initial_clicks >= clicks:
+                    break
+                await asyncio.sleep(delay)
+                delay *= 2
             
-            if final_clicks > initial_clicks:
-                self.log_test("Click Tracking", "PASS", f"Clicks: {initial_clicks} → {final_clicks}")
+            if final_clicks - initial_clicks == clicks:
+                self.log_test("Click Tracking", "PASS", f"Clicks: {initial_clicks} → {final_clicks} ({clicks} redirects)")
                 return True
             else:
-                self.log_test("Click Tracking", "FAIL", f"Clicks not incremented: {initial_clicks} → {final_clicks}")
+                self.log_test("Click Tracking", "FAIL", f"Expected +{clicks} clicks: {initial_clicks} → {final_clicks}")
                 return False
                 
         except Exception as e:
@@ -217,12 +266,17 @@ class ProductionTester:
             return False
     
     async def test_error_handling(self):
-        """Test API error handling"""
-        # Test invalid URL
+        """Test API error handling (both checks run concurrently)"""
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(self._test_invalid_url())
+            tg.create_task(self._test_not_found())
+    
+    async def _test_invalid_url(self):
+        """Invalid URLs must be rejected by validation"""
         try:
             async with self.session.post(
                 f"{self.base_url}/shorten",
-                json={"url": "not-a-valid-url"},
+                data=_INVALID_URL_BODY,
                 headers={"Content-Type": "application/json"}
             ) as response:
                 
@@ -232,8 +286,9 @@ class ProductionTester:
                     self.log_test("Error Handling (Invalid URL)", "FAIL", f"Status: {response.status}")
         except Exception as e:
             self.log_test("Error Handling (Invalid URL)", "FAIL", f"Request error: {str(e)}")
-        
-        # Test non-existent short code
+    
+    async def _test_not_found(self):
+        """Unknown short codes must return 404"""
         try:
             async with self.session.get(f"{self.base_url}/nonexistent123") as response:
                 if response.status == 404:
@@ -248,45 +303,30 @@ class ProductionTester:
         print(f"\n🚀 Starting Production Test Suite for: {self.base_url}")
         print("=" * 60)
         
-        # Test 1: Health Check
-        if not await self.test_health_check():
+        # Phase 1: checks with no data dependencies run concurrently
+        custom_code = f"test-{int(time.time())}"
+        healthy, *_ = await asyncio.gather(
+            self.test_health_check(),
+            self.test_stats(),
+            self.test_error_handling(),
+            self.test_shorten_url("https://www.example.com/test-page", custom_code),
+        )
+        self.flush()
+        if not healthy:
             print("\n❌ API is not accessible. Stopping tests.")
             return
         
         print()
         
-        # Test 2: URL Shortening (Auto-generated code)
+        # Phase 2: shorten → redirect → info → click tracking depend on each other
         test_url = "https://github.com/frederickluna/talisik-short-url"
         short_code = await self.test_shorten_url(test_url)
         
         if short_code:
-            # Test 3: URL Redirection
             await self.test_redirect(short_code, test_url)
-            
-            # Test 4: URL Info
-            await self.test_get_info(short_code)
-            
-            # Test 5: Click Tracking
-            await self.test_click_tracking(short_code)
-        
-        print()
-        
-        # Test 6: Custom Code Shortening
-        custom_code = f"test-{int(time.time())}"
-        custom_short_code = await self.test_shorten_url(
-            "https://www.example.com/test-page", 
-            custom_code
-        )
-        
-        print()
-        
-        # Test 7: API Statistics
-        await self.test_stats()
-        
-        print()
-        
-        # Test 8: Error Handling
-        await self.test_error_handling()
+            info = await self.test_get_info(short_code)
+            await self.test_click_tracking(short_code, initial_clicks=info.click_count if info else None)
+        self.flush()
         
         print()
         
@@ -299,23 +339,26 @@ class ProductionTester:
         passed_tests = len([r for r in self.test_results if r["status"] == "PASS"])
         failed_tests = len([r for r in self.test_results if r["status"] == "FAIL"])
         
-        print("=" * 60)
-        print(f"📊 TEST SUMMARY")
-        print(f"Total Tests: {total_tests}")
-        print(f"✅ Passed: {passed_tests}")
-        print(f"❌ Failed: {failed_tests}")
-        print(f"Success Rate: {(passed_tests/total_tests*100):.1f}%")
+        self._buf.append("=" * 60)
+        self._buf.append(f"📊 TEST SUMMARY")
+        self._buf.append(f"Total Tests: {total_tests}")
+        self._buf.append(f"✅ Passed: {passed_tests}")
+        self._buf.append(f"❌ Failed: {failed_tests}")
+        self._buf.append(f"Success Rate: {(passed_tests/total_tests*100):.1f}%")
         
         if failed_tests > 0:
-            print(f"\n❌ Failed Tests:")
+            self._buf.append(f"\n❌ Failed Tests:")
             for result in self.test_results:
                 if result["status"] == "FAIL":
-                    print(f"   • {result['test']}: {result['details']}")
+                    failed_at = datetime.fromtimestamp(result["timestamp"] / 1e9).isoformat(timespec="seconds")
+                    self._buf.append(f"   • [{failed_at}] {result['test']}: {result['details']}")
         
         if passed_tests == total_tests:
-            print(f"\n🎉 All tests passed! Your production API is working perfectly.")
+            self._buf.append(f"\n🎉 All tests passed! Your production API is working perfectly.")
         else:
-            print(f"\n⚠️  Some tests failed. Please review the issues above.")
+            self._buf.append(f"\n⚠️  Some tests failed. Please review the issues above.")
+        
+        self.flush()
 
 
 async def main():
@@ -8,13 +8,23 @@ from xata import XataClient
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Built on first use and kept, so repeated runs in one process reuse its HTTP connection pool
+_CLIENT = None
+
+def _client() -> XataClient:
+    """Module-wide XataClient"""
+    global _CLIENT
+    if _CLIENT is None:
+        config = get_config()
+        _CLIENT = XataClient(
+            api_key=config.xata_api_key,
+            db_url=config.xata_database_url
+        )
+    return _CLIENT
+
 def test_simple_insert():
     """Test the simplest possible insert to isolate constraint issue"""
-    config = get_config()
-    client = XataClient(
-        api_key=config.xata_api_key,
-        db_url=config.xata_database_url
-    )
+    client = _client()
     
     # Test 1: Try with explicit xata_id
     logger.info("Test 1: Insert with explicit xata_id")
@@ -1,88 +1,185 @@
 #!/usr/bin/env python3
-"""Test script to verify Xata integration is working"""
+"""Test script to verify Xata integration is working
+
+Runs against a mocked XataClient by default; pass --live to hit the real
+database configured in .env, and --trace to log full Xata responses.
+"""
 
 import sys
+import time
+import queue
 import logging
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import lru_cache
+from logging.handlers import QueueHandler, QueueListener
 from datetime import datetime, UTC
+from types import ModuleType
+from unittest.mock import MagicMock, patch
+
+from talisik.core.shortener import URLShortener
+from talisik.core.models import ShortenRequest
+from talisik.core.config import get_config, TalisikConfig
+from talisik.core.storage import XataStorage
+
+# Set up logging: callers only enqueue records, a background listener
+# thread does the formatting and the stderr writes. The probes run on
+# worker threads, so each line names the thread that logged it
+_log_queue = queue.Queue(maxsize=10000)
+_stream_handler = logging.StreamHandler(sys.stderr)
+_stream_handler.setFormatter(logging.Formatter('%(asctime)s - %(threadName)s - %(levelname)s - %(message)s'))
+_listener = QueueListener(_log_queue, _stream_handler, respect_handler_level=True)
+
+class _DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves message formatting to the listener thread"""
+    
+    def prepare(self, record):
+        # The base class merges msg % args here, on the logging thread, so
+        # records can be pickled; ours never leave the process. Logged
+        # objects must not be mutated afterwards (none are in this script)
+        return record
+
+class _DedupFilter(logging.Filter):
+    """Drop a repeat of the same message template and trailing detail within a time window"""
+    
+    def __init__(self, window: float = 5.0):
+        super().__init__()
+        self.window = window
+        self._last_seen = {}
+    
+    def filter(self, record):
+        # Keyed on the unformatted template plus its last argument (the error
+        # in the probe loops), so N rows failing the same way log once; per
+        # thread, as the concurrent probes share some messages
+        detail = str(record.args[-1])[:64] if isinstance(record.args, tuple) and record.args else None
+        key = (record.thread, record.levelno, record.msg, detail)
+        now = time.monotonic()
+        if now - self._last_seen.get(key, float("-inf")) < self.window:
+            return False
+        self._last_seen[key] = now
+        return True
+
+# Below DEBUG: full response dumps from the debug probes, enabled by --trace
+TRACE = 5
+logging.addLevelName(TRACE, "TRACE")
 
-# Set up logging
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+_root = logging.getLogger()
+_queue_handler = _DeferredQueueHandler(_log_queue)
+# Handler-level, so it also sees records propagated from child loggers
+_queue_handler.addFilter(_DedupFilter())
+_root.addHandler(_queue_handler)
+_root.setLevel(TRACE if "--trace" in sys.argv[1:] else logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+LIVE = "--live" in sys.argv[1:]
+
+def _mock_xata():
+    """Install a fake xata module whose XataClient returns canned responses"""
+    client = MagicMock(name="XataClient()")
+    client.sql.return_value.query.return_value = {"records": [{"xata_id": "mock1", "short_code": "mock1"}]}
+    client.data.return_value.query.return_value = {"records": []}
+    client.records.return_value.insert.return_value = {"id": "mock1"}
+    client.records.return_value.get.return_value = {"id": "mock1"}
+    
+    # Patching sys.modules works whether or not the real SDK is installed
+    module = ModuleType("xata")
+    module.XataClient = MagicMock(return_value=client)
+    return patch.dict(sys.modules, {"xata": module})
+
+def _xata_config():
+    """Xata settings: .env for --live runs, placeholders for the mocked backend"""
+    if LIVE:
+        return get_config()
+    return TalisikConfig(xata_api_key="mock", xata_database_url="mock", storage_backend="xata")
+
+@lru_cache(maxsize=1)
+def _get_client():
+    """XataClient shared by every Xata probe, so its HTTP session is reused"""
+    from xata import XataClient
+    
+    config = _xata_config()
+    return XataClient(
+        api_key=config.xata_api_key,
+        db_url=config.xata_database_url
+    )
+
+@lru_cache(maxsize=None)
+def get_shortener(backend: str) -> URLShortener:
+    """URLShortener per backend ("xata" or "memory"), built once per run"""
+    if backend == "xata":
+        config = _xata_config()
+        storage = None  # whatever STORAGE_BACKEND selects
+        if config.storage_backend == "xata":
+            # Reuse the debug probes' client rather than building a second one
+            storage = XataStorage(config)
+            storage._client = _get_client()
+        return URLShortener(config=config, storage=storage)
+    config = TalisikConfig(
+        xata_api_key="dummy", 
+        xata_database_url="dummy",
+        storage_backend="memory"
+    )
+    return URLShortener(config=config)
+
 def test_xata_integration():
     """Test the Xata integration with URLShortener"""
     try:
-        # Import our classes
-        from talisik.core.shortener import URLShortener
-        from talisik.core.models import ShortenRequest
-        from talisik.core.config import get_config
-        
         logger.info("Starting Xata integration test...")
         
         # Load configuration (should use Xata backend from .env)
-        config = get_config()
-        logger.info(f"Loaded config - Storage backend: {config.storage_backend}")
-        logger.info(f"Base URL: {config.base_url}")
+        config = _xata_config()
+        logger.info("Loaded config - Storage backend: %s", config.storage_backend)
+        logger.info("Base URL: %s", config.base_url)
         
         # Initialize URLShortener
-        shortener = URLShortener(config=config)
+        shortener = get_shortener("xata")
         logger.info("URLShortener initialized successfully")
         
         # Test URL shortening
         test_url = "https://example.com/test-xata-integration"
-        logger.info(f"Shortening URL: {test_url}")
+        logger.info("Shortening URL: %s", test_url)
         
-        request = ShortenRequest(url=test_url, custom_code=f"test-{int(datetime.now().timestamp())}")
+        request = ShortenRequest(url=test_url, custom_code=f"test-{int(time.time())}")
         response = shortener.shorten(request)
         
         if response.success:
             logger.info("✅ URL shortened successfully!")
-            logger.info(f"   Short URL: {response.short_url}")
-            logger.info(f"   Short Code: {response.short_code}")
+            logger.info("   Short URL: %s", response.short_url)
+            logger.info("   Short Code: %s", response.short_code)
             
             # Test URL expansion
-            logger.info(f"Testing expansion of code: {response.short_code}")
+            logger.info("Testing expansion of code: %s", response.short_code)
             expanded_url = shortener.expand(response.short_code)
             
             if expanded_url == test_url:
                 logger.info("✅ URL expansion successful!")
-                logger.info(f"   Expanded URL: {expanded_url}")
+                logger.info("   Expanded URL: %s", expanded_url)
                 
                 # Test stats
                 stats = shortener.get_stats()
-                logger.info(f"📊 Stats: {stats}")
+                logger.info("📊 Stats: %s", stats)
                 
                 return True
             else:
-                logger.error(f"❌ URL expansion failed! Expected: {test_url}, Got: {expanded_url}")
+                logger.error("❌ URL expansion failed! Expected: %s, Got: %s", test_url, expanded_url)
                 return False
         else:
-            logger.error(f"❌ URL shortening failed: {response.error}")
+            logger.error("❌ URL shortening failed: %s", response.error)
             return False
             
     except Exception as e:
-        logger.error(f"❌ Test failed with exception: {e}")
-        import traceback
+        logger.error("❌ Test failed with exception: %s", e)
         traceback.print_exc()
         return False
 
 def test_memory_storage():
     """Test memory storage as a fallback"""
     try:
-        from talisik.core.shortener import URLShortener
-        from talisik.core.models import ShortenRequest
-        from talisik.core.config import TalisikConfig
-        
         logger.info("\n--- Testing Memory Storage Fallback ---")
         
-        # Create config with memory storage
-        config = TalisikConfig(
-            xata_api_key="dummy", 
-            xata_database_url="dummy",
-            storage_backend="memory"
-        )
-        
-        shortener = URLShortener(config=config)
+        # Shortener over memory storage
+        shortener = get_shortener("memory")
         
         request = ShortenRequest(url="https://example.com/memory-test")
         response = shortener.shorten(request)
@@ -90,108 +187,142 @@ def test_memory_storage():
         # Check if response has success attribute
         if hasattr(response, 'success'):
             if response.success and shortener.expand(response.short_code) == "https://example.com/memory-test":
-                logger.info(f"✅ Memory storage test passed! Short code: {response.short_code}")
+                logger.info("✅ Memory storage test passed! Short code: %s", response.short_code)
                 return True
             else:
-                logger.error(f"❌ Memory storage test failed! Success: {response.success}, Error: {getattr(response, 'error', 'Unknown')}")
+                logger.error("❌ Memory storage test failed! Success: %s, Error: %s", response.success, getattr(response, 'error', 'Unknown'))
                 return False
         else:
             # Fallback for old model format - check if we got a valid response
             if response.short_code and shortener.expand(response.short_code) == "https://example.com/memory-test":
-                logger.info(f"✅ Memory storage test passed! Short code: {response.short_code}")
+                logger.info("✅ Memory storage test passed! Short code: %s", response.short_code)
                 return True
             else:
                 logger.error("❌ Memory storage test failed!")
                 return False
             
     except Exception as e:
-        logger.error(f"❌ Memory storage test failed: {e}")
-        import traceback
+        logger.error("❌ Memory storage test failed: %s", e)
         traceback.print_exc()
         return False
 
+def _summary(response):
+    """Type, status, record count and first-record keys of a Xata response - no repr"""
+    records = response.get("records") if hasattr(response, "get") else None
+    return {
+        "type": type(response).__name__,
+        "status_code": getattr(response, "status_code", None),
+        "n_records": len(records) if records is not None else None,
+        "first_keys": list(records[0]) if records else None,
+    }
+
+_PROBE_INSERT = "INSERT INTO short_urls (original_url, short_code, click_count, is_active) VALUES ($1, $2, $3, $4) RETURNING xata_id"
+
+# Inserts every candidate and reports, per candidate index, whether its row
+# went in (ok) or hit an existing code - one round trip for the whole probe
+_PROBE_BATCH = """
+    WITH candidates(i, url, code) AS (VALUES {values}),
+    ins AS (
+        INSERT INTO short_urls (original_url, short_code, click_count, is_active)
+        SELECT url, code, 0, true FROM candidates
+        ON CONFLICT DO NOTHING
+        RETURNING short_code
+    )
+    SELECT c.i, EXISTS (SELECT 1 FROM ins WHERE ins.short_code = c.code) AS ok
+    FROM candidates c
+    ORDER BY c.i
+"""
+
+def _probe_inserts(client, label, rows):
+    """Insert (url, code) probe rows in one statement, going row by row only if it is rejected"""
+    values_sql = ", ".join(f"(${3*i+1}::int, ${3*i+2}::text, ${3*i+3}::text)" for i in range(len(rows)))
+    params = [value for i, (url, code) in enumerate(rows) for value in (i, url, code)]
+    try:
+        response = client.sql().query(_PROBE_BATCH.format(values=values_sql), params)
+        ok = {int(record["i"]): record["ok"] for record in response.get("records", []) if "i" in record}
+        for i, (url, code) in enumerate(rows):
+            logger.info("%s test %s %s: %s / %s", label, i, "SUCCESS" if ok.get(i) else "EXISTS", url, code)
+        return
+    except Exception as e:
+        # A CHECK violation aborts the whole statement, so isolate the row
+        logger.info("%s batch rejected, probing row by row: %s", label, e)
+    
+    for i, (url, code) in enumerate(rows):
+        try:
+            response = client.sql().query(_PROBE_INSERT, [url, code, 0, True])
+            logger.info("%s test %s SUCCESS: %s / %s -> %s", label, i, url, code, response)
+            break  # If one succeeds, we found the issue
+        except Exception as e:
+            logger.info("%s test %s FAILED: %s / %s -> %s", label, i, url, code, e)
+
 def debug_xata_response():
     """Debug the Xata response format"""
     try:
-        from talisik.core.config import get_config
-        from xata import XataClient
-        
         logger.info("\n--- Debugging Xata Response Format ---")
         
-        config = get_config()
-        client = XataClient(
-            api_key=config.xata_api_key,
-            db_url=config.xata_database_url
-        )
+        client = _get_client()
+        # One clock read per run; generated probe codes derive from it
+        base = time.time_ns()
         
         # Try a simple query to see the response format
         logger.info("Testing direct Xata data().query()...")
         query_payload = {"page": {"size": 5}}
         response = client.data().query("short_urls", query_payload)
         
-        logger.info(f"Raw Xata response: {response}")
-        logger.info(f"Response type: {type(response)}")
+        logger.info("Response summary: %s", _summary(response))
         
-        if hasattr(response, '__dict__'):
-            logger.info(f"Response attributes: {response.__dict__}")
-            
-        # Check if we have records
-        if response and response.get('records'):
-            logger.info(f"Found {len(response['records'])} records")
-            if len(response['records']) > 0:
-                logger.info(f"First record structure: {response['records'][0]}")
-        else:
-            logger.info("No records found in response")
+        # Full dumps repr every record, so only build them at TRACE (--trace)
+        if logger.isEnabledFor(TRACE):
+            logger.log(TRACE, "Raw Xata response: %s", response)
+            if hasattr(response, '__dict__'):
+                logger.log(TRACE, "Response attributes: %s", response.__dict__)
             
         # Try SQL query as fallback
         logger.info("\nTesting SQL query fallback...")
         try:
             sql_response = client.sql().query("SELECT * FROM short_urls LIMIT 5")
-            logger.info(f"SQL response: {sql_response}")
-            logger.info(f"SQL response type: {type(sql_response)}")
-            
-            if sql_response and sql_response.get('records'):
-                logger.info(f"Found {len(sql_response['records'])} records via SQL")
-                if len(sql_response['records']) > 0:
-                    logger.info(f"First SQL record: {sql_response['records'][0]}")
-            else:
-                logger.info("No records found via SQL")
+            logger.info("SQL response summary: %s", _summary(sql_response))
+            if logger.isEnabledFor(TRACE):
+                logger.log(TRACE, "SQL response: %s", sql_response)
                 
         except Exception as sql_e:
-            logger.error(f"SQL query failed: {sql_e}")
+            logger.error("SQL query failed: %s", sql_e)
             
         # Try direct insert test
         logger.info("\nTesting direct record insert...")
         try:
             test_record = {
                 "original_url": "https://example.com/debug-test",
-                "short_code": f"debug-{int(datetime.now(UTC).timestamp())}",
+                "short_code": f"debug-{base}",
                 "created_at": datetime.now(UTC).isoformat(),
                 "click_count": 0,
                 "is_active": True
             }
             
-            logger.info(f"Inserting test record: {test_record}")
+            logger.info("Inserting test record: %s", test_record)
             insert_result = client.records().insert("short_urls", test_record)
-            logger.info(f"Insert result: {insert_result}")
-            logger.info(f"Insert result type: {type(insert_result)}")
+            logger.info("Insert result summary: %s", _summary(insert_result))
+            if logger.isEnabledFor(TRACE):
+                logger.log(TRACE, "Insert result: %s", insert_result)
             
             if hasattr(insert_result, 'is_success'):
-                logger.info(f"Insert success status: {insert_result.is_success()}")
+                logger.info("Insert success status: %s", insert_result.is_success())
                 if hasattr(insert_result, 'status_code'):
-                    logger.info(f"Insert status code: {insert_result.status_code}")
+                    logger.info("Insert status code: %s", insert_result.status_code)
             
             # Check if we can query the record back
             if insert_result and (insert_result.get('id') or insert_result.get('xata_id')):
                 record_id = insert_result.get('id') or insert_result.get('xata_id')
-                logger.info(f"Record inserted with ID: {record_id}")
+                logger.info("Record inserted with ID: %s", record_id)
                 
                 # Try to get it back
                 get_result = client.records().get("short_urls", record_id)
-                logger.info(f"Get result: {get_result}")
+                logger.info("Get result summary: %s", _summary(get_result))
+                if logger.isEnabledFor(TRACE):
+                    logger.log(TRACE, "Get result: %s", get_result)
             
         except Exception as insert_e:
-            logger.error(f"Direct insert test failed: {insert_e}")
+            logger.error("Direct insert test failed: %s", insert_e)
         
         # Try to insert a very basic record to isolate which constraint is failing
         logger.info("Testing very basic insert...")
@@ -199,10 +330,10 @@ def debug_xata_response():
             basic_response = client.sql().query(
                 "INSERT INTO short_urls (original_url, short_code) VALUES ('https://google.com', 'abc123') RETURNING xata_id"
             )
-            logger.info(f"Basic insert result: {basic_response}")
+            logger.info("Basic insert result: %s", basic_response)
             
         except Exception as e:
-            logger.info(f"Basic insert failed: {e}")
+            logger.info("Basic insert failed: %s", e)
             
         # Test different URL formats to see if URL constraint is the issue
         logger.info("Testing different URL formats...")
@@ -213,17 +344,7 @@ def debug_xata_response():
             "https://example.com/very/long/path/to/test/url/validation"
         ]
         
-        for i, test_url in enumerate(test_urls):
-            try:
-                test_code = f"test{i}"
-                response = client.sql().query(
-                    "INSERT INTO short_urls (original_url, short_code, click_count, is_active) VALUES ($1, $2, $3, $4) RETURNING xata_id",
-                    [test_url, test_code, 0, True]
-                )
-                logger.info(f"URL test {i} SUCCESS: {test_url} -> {response}")
-                break  # If one succeeds, we found the issue
-            except Exception as e:
-                logger.info(f"URL test {i} FAILED: {test_url} -> {e}")
+        _probe_inserts(client, "URL", [(test_url, f"test{i}-{base}") for i, test_url in enumerate(test_urls)])
                 
         # Test different short code formats
         logger.info("Testing different short code formats...")
@@ -236,38 +357,21 @@ def debug_xata_response():
             "test_code"    # with underscore
         ]
         
-        for i, test_code in enumerate(test_codes):
-            try:
-                response = client.sql().query(
-                    "INSERT INTO short_urls (original_url, short_code, click_count, is_active) VALUES ($1, $2, $3, $4) RETURNING xata_id",
-                    ["https://example.com", test_code, 0, True]
-                )
-                logger.info(f"Code test {i} SUCCESS: {test_code} -> {response}")
-                break  # If one succeeds, we found the issue
-            except Exception as e:
-                logger.info(f"Code test {i} FAILED: {test_code} -> {e}")
+        _probe_inserts(client, "Code", [("https://example.com", test_code) for test_code in test_codes])
         
         return True
         
     except Exception as e:
-        logger.error(f"❌ Xata debug failed: {e}")
-        import traceback
+        logger.error("❌ Xata debug failed: %s", e)
         traceback.print_exc()
         return False
 
 def debug_table_schema():
     """Debug the table schema to understand constraints"""
     try:
-        from talisik.core.config import get_config
-        from xata import XataClient
-        
         logger.info("\n--- Debugging Table Schema ---")
         
-        config = get_config()
-        client = XataClient(
-            api_key=config.xata_api_key,
-            db_url=config.xata_database_url
-        )
+        client = _get_client()
         
         # Try to get table schema information
         logger.info("Getting table schema information...")
@@ -277,10 +381,10 @@ def debug_table_schema():
                 "INSERT INTO short_urls (original_url, short_code, created_at, click_count, is_active) VALUES ($1, $2, $3, $4, $5) RETURNING xata_id",
                 ["https://test.com", "test123", "2025-06-02T08:00:00+00:00", 0, True]
             )
-            logger.info(f"Simple insert result: {sql_response}")
+            logger.info("Simple insert result: %s", sql_response)
             
         except Exception as e:
-            logger.info(f"Simple insert failed: {e}")
+            logger.info("Simple insert failed: %s", e)
             
         # Try to describe the table structure 
         logger.info("Checking table structure...")
@@ -288,10 +392,10 @@ def debug_table_schema():
             schema_response = client.sql().query(
                 "SELECT column_name, data_type, is_nullable, column_default FROM information_schema.columns WHERE table_name = 'short_urls'"
             )
-            logger.info(f"Schema query result: {schema_response}")
+            logger.info("Schema query result: %s", schema_response)
             
         except Exception as e:
-            logger.info(f"Schema query failed: {e}")
+            logger.info("Schema query failed: %s", e)
             
         # Check for constraints
         logger.info("Checking table constraints...")
@@ -299,10 +403,10 @@ def debug_table_schema():
             constraints_response = client.sql().query(
                 "SELECT constraint_name, constraint_type FROM information_schema.table_constraints WHERE table_name = 'short_urls'"
             )
-            logger.info(f"Constraints query result: {constraints_response}")
+            logger.info("Constraints query result: %s", constraints_response)
             
         except Exception as e:
-            logger.info(f"Constraints query failed: {e}")
+            logger.info("Constraints query failed: %s", e)
             
         # Check for detailed constraint definitions
         logger.info("Getting detailed constraint definitions...")
@@ -319,10 +423,10 @@ def debug_table_schema():
                 WHERE tc.table_name = 'short_urls'
                 """
             )
-            logger.info(f"Detailed constraints query result: {constraints_detail_response}")
+            logger.info("Detailed constraints query result: %s", constraints_detail_response)
             
         except Exception as e:
-            logger.info(f"Detailed constraints query failed: {e}")
+            logger.info("Detailed constraints query failed: %s", e)
             
         # Try to insert a very basic record to isolate which constraint is failing
         logger.info("Testing very basic insert...")
@@ -330,16 +434,15 @@ def debug_table_schema():
             basic_response = client.sql().query(
                 "INSERT INTO short_urls (original_url, short_code) VALUES ('https://google.com', 'abc123') RETURNING xata_id"
             )
-            logger.info(f"Basic insert result: {basic_response}")
+            logger.info("Basic insert result: %s", basic_response)
             
         except Exception as e:
-            logger.info(f"Basic insert failed: {e}")
+            logger.info("Basic insert failed: %s", e)
         
         return True
         
     except Exception as e:
-        logger.error(f"❌ Schema debug failed: {e}")
-        import traceback
+        logger.error("❌ Schema debug failed: %s", e)
         traceback.print_exc()
         return False
 
@@ -348,10 +451,27 @@ if __name__ == "__main__":
     print("🧪 TALISIK XATA INTEGRATION TEST")
     print("=" * 60)
     
-    xata_success = test_xata_integration()
-    memory_success = test_memory_storage()
-    debug_success = debug_xata_response()
-    schema_success = debug_table_schema()
+    _listener.start()
+    logger.info("Xata backend: %s", "live" if LIVE else "mocked (pass --live for the real database)")
+    # The Xata probes are network-bound, so run them side by side; the
+    # memory test touches no shared state and stays on the main thread
+    with nullcontext() if LIVE else _mock_xata(), \
+            ThreadPoolExecutor(max_workers=3, thread_name_prefix="xata-probe") as executor:
+        futures = {
+            name: executor.submit(probe)
+            for name, probe in [
+                ("xata", test_xata_integration),
+                ("debug", debug_xata_response),
+                ("schema", debug_table_schema),
+            ]
+        }
+        memory_success = test_memory_storage()
+        results = {name: future.result() for name, future in futures.items()}
+    xata_success = results["xata"]
+    debug_success = results["debug"]
+    schema_success = results["schema"]
+    # Drain queued log records before the summary is printed
+    _listener.stop()
     
     print("\n" + "=" * 60)
     if xata_success and memory_success:
@@ -0,0 +1,22 @@
+"""Shared fixtures for the unit tests"""
+
+import pytest
+
+from talisik.core.config import TalisikConfig
+from talisik.core.shortener import URLShortener
+from talisik.core.storage import MemoryStorage
+
+
+@pytest.fixture(scope="session")
+def _shortener_template():
+    """One URLShortener for the whole session, so config/storage setup runs once"""
+    # Explicit config: the suite must not depend on XATA_* being set
+    config = TalisikConfig(xata_api_key="x", xata_database_url="y", storage_backend="memory")
+    return URLShortener(base_url="http://test.com", config=config, storage=MemoryStorage())
+
+
+@pytest.fixture
+def shortener(_shortener_template):
+    """The session URLShortener with its in-memory store emptied for this test"""
+    _shortener_template.storage._urls.clear()
+    yield _shortener_template
@@ -0,0 +1,77 @@
+"""Tests for the FastAPI redirect endpoints"""
+
+import importlib
+import time
+from datetime import datetime, timedelta, UTC
+
+import pytest
+from fastapi.testclient import TestClient
+
+from talisik.core import config as config_module
+
+
+@pytest.fixture
+def api(monkeypatch):
+    """api.main over in-memory storage, with its expand cache emptied"""
+    monkeypatch.setenv("XATA_API_KEY", "x")
+    monkeypatch.setenv("XATA_DATABASE_URL", "y")
+    monkeypatch.setenv("STORAGE_BACKEND", "memory")
+    monkeypatch.setattr(config_module, "config", None)
+    main = importlib.import_module("api.main")
+    main.shortener.storage._urls.clear()
+    main._expand_cache.clear()
+    return main
+
+
+@pytest.fixture
+def client(api):
+    return TestClient(api.app)
+
+
+class TestRedirectCache:
+    """Test suite for the cached redirect path"""
+
+    def _shorten(self, client, **body):
+        response = client.post("/shorten", json={"url": "https://example.com", **body})
+        assert response.status_code == 200
+        return response.json()["short_code"]
+
+    def test_cached_redirect_counts_clicks(self, api, client):
+        """Test that a cache hit still redirects and records the click"""
+        code = self._shorten(client)
+
+        for _ in range(2):
+            response = client.get(f"/{code}", follow_redirects=False)
+            assert response.status_code == 301
+            assert response.headers["location"] == "https://example.com"
+        assert api.shortener.get_info(code)["click_count"] == 2
+
+    def test_expired_code_404s_on_next_request(self, api, client):
+        """Test that a redirect cached just before expiry isn't served after it"""
+        code = self._shorten(client, expires_hours=1)
+        # Bring the expiry inside the cache TTL, then cache the redirect
+        api.shortener.storage._urls[code].expires_at = datetime.now(UTC) + timedelta(milliseconds=50)
+        assert client.get(f"/{code}", follow_redirects=False).status_code == 301
+
+        time.sleep(0.06)
+
+        assert client.get(f"/{code}", follow_redirects=False).status_code == 404
+        assert api.shortener.get_info(code)["click_count"] == 1
+
+    def test_deactivated_code_404s_on_next_request(self, api, client):
+        """Test that deactivate() drops the cached redirect immediately"""
+        code = self._shorten(client)
+        assert client.get(f"/{code}", follow_redirects=False).status_code == 301
+
+        assert api.shortener.deactivate(code) is True
+
+        assert client.get(f"/{code}", follow_redirects=False).status_code == 404
+
+    def test_deleted_code_404s_on_next_request(self, api, client):
+        """Test that delete() drops the cached redirect immediately"""
+        code = self._shorten(client)
+        assert client.get(f"/{code}", follow_redirects=False).status_code == 301
+
+        assert api.shortener.delete(code) is True
+
+        assert client.get(f"/{code}", follow_redirects=False).status_code == 404
@@ -0,0 +1,68 @@
+"""Tests for the in-process TTL cache"""
+
+import time
+
+from talisik.core.cache import BloomFilter, TTLCache
+
+
+class TestTTLCache:
+    """Test suite for TTLCache"""
+
+    def test_get_set(self):
+        """Test storing and retrieving a value"""
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set("abc", "https://example.com")
+
+        assert cache.get("abc") == "https://example.com"
+        assert cache.get("missing") is None
+
+    def test_entries_expire(self):
+        """Test that entries are dropped once their TTL passes"""
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set("abc", "https://example.com", ttl=0)
+
+        time.sleep(0.001)
+        assert cache.get("abc") is None
+        assert len(cache) == 0
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted when full"""
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")  # "b" is now least recently used
+        cache.set("c", 3)
+
+        assert "a" in cache
+        assert "b" not in cache
+        assert "c" in cache
+
+    def test_pop_invalidates(self):
+        """Test explicit invalidation"""
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set("abc", "https://example.com")
+
+        assert cache.pop("abc") == "https://example.com"
+        assert cache.get("abc") is None
+
+
+class TestBloomFilter:
+    """Test suite for BloomFilter"""
+
+    def test_no_false_negatives(self):
+        """Test that every added key is reported as present"""
+        bloom = BloomFilter(capacity=1000)
+        codes = [f"code{i}" for i in range(1000)]
+        for code in codes:
+            bloom.add(code)
+
+        assert all(code in bloom for code in codes)
+
+    def test_false_positive_rate(self):
+        """Test that unknown keys are mostly rejected at capacity"""
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f"code{i}")
+
+        false_positives = sum(f"other{i}" in bloom for i in range(10000))
+        assert false_positives < 300  # ~1% expected
@@ -0,0 +1,24 @@
+"""Tests for environment-driven configuration"""
+
+from talisik.core.config import TalisikConfig
+
+_REQUIRED = {"XATA_API_KEY": "x", "XATA_DATABASE_URL": "y"}
+
+
+class TestTalisikConfig:
+    """Test suite for TalisikConfig.from_env"""
+
+    def test_reads_environment_at_call_time(self, monkeypatch):
+        """Test that changes made after import are picked up"""
+        for name, value in _REQUIRED.items():
+            monkeypatch.setenv(name, value)
+        monkeypatch.setenv("BASE_URL", "https://downlodr.com")
+
+        assert TalisikConfig.from_env().base_url == "https://downlodr.com"
+
+    def test_only_explicit_truthy_flags_enable(self):
+        """Test that true/1/yes enable a flag and anything else disables it"""
+        for value, expected in [("true", True), ("YES", True), ("1", True),
+                                ("trash", False), ("yes-ish", False), ("0", False)]:
+            config = TalisikConfig.from_env({**_REQUIRED, "DEBUG": value})
+            assert config.debug is expected, value
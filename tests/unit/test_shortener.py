@@ -3,98 +3,101 @@
 import pytest
 from datetime import datetime, timedelta, UTC
 
+from talisik.core.config import TalisikConfig
 from talisik.core.shortener import URLShortener
-from talisik.core.models import ShortenRequest
+from talisik.core.models import ShortenRequest, ShortURL
+from talisik.core.storage import MemoryStorage
+
+# ShortenRequest is frozen, so one instance can be shared by every test
+EXAMPLE_URL = "https://example.com"
+EXAMPLE_REQUEST = ShortenRequest(url=EXAMPLE_URL)
 
 
 class TestURLShortener:
     """Test suite for URLShortener class"""
 
-    def setup_method(self):
-        """Set up fresh URLShortener for each test"""
-        self.shortener = URLShortener(base_url="http://test.com")
-
-    def test_shorten_valid_url(self):
+    def test_shorten_valid_url(self, shortener):
         """Test shortening a valid URL"""
-        request = ShortenRequest(url="https://example.com")
-        result = self.shortener.shorten(request)
+        result = shortener.shorten(EXAMPLE_REQUEST)
         
         assert result.short_url.startswith("http://test.com/")
-        assert result.original_url == "https://example.com"
+        assert result.original_url == EXAMPLE_URL
         assert len(result.short_code) == 7  # Default length
         assert result.expires_at is None
 
-    def test_shorten_invalid_url(self):
-        """Test that invalid URLs raise an error"""
-        request = ShortenRequest(url="not-a-url")
+    @pytest.mark.parametrize("bad_url", ["not-a-url", "", "http://", "://nohost", "javascript:alert(1)"])
+    def test_shorten_invalid_url(self, shortener, bad_url):
+        """Test that invalid URLs are rejected"""
+        result = shortener.shorten(ShortenRequest(url=bad_url))
         
-        with pytest.raises(ValueError, match="Invalid URL provided"):
-            self.shortener.shorten(request)
+        assert not result.success
+        assert result.error == "Invalid URL provided"
 
-    def test_expand_existing_code(self):
+    def test_expand_existing_code(self, shortener):
         """Test expanding an existing short code"""
         # First shorten a URL
-        request = ShortenRequest(url="https://example.com")
-        result = self.shortener.shorten(request)
+        result = shortener.shorten(EXAMPLE_REQUEST)
         
         # Then expand it
-        expanded = self.shortener.expand(result.short_code)
-        assert expanded == "https://example.com"
+        expanded = shortener.expand(result.short_code)
+        assert expanded == EXAMPLE_URL
 
-    def test_expand_nonexistent_code(self):
+    def test_expand_nonexistent_code(self, shortener):
         """Test expanding a code that doesn't exist"""
-        result = self.shortener.expand("nonexistent")
+        result = shortener.expand("nonexistent")
         assert result is None
 
-    def test_custom_short_code(self):
+    def test_custom_short_code(self, shortener):
         """Test using a custom short code"""
         request = ShortenRequest(url="https://example.com", custom_code="custom123")
-        result = self.shortener.shorten(request)
+        result = shortener.shorten(request)
         
         assert result.short_code == "custom123"
         assert result.short_url == "http://test.com/custom123"
 
-    def test_duplicate_custom_code_fails(self):
+    def test_duplicate_custom_code_fails(self, shortener):
         """Test that duplicate custom codes fail"""
         # Create first URL with custom code
         request1 = ShortenRequest(url="https://example.com", custom_code="duplicate")
-        self.shortener.shorten(request1)
+        shortener.shorten(request1)
         
         # Try to create second URL with same custom code
         request2 = ShortenRequest(url="https://other.com", custom_code="duplicate")
+        result = shortener.shorten(request2)
         
-        with pytest.raises(ValueError, match="Short code 'duplicate' already exists"):
-            self.shortener.shorten(request2)
+        assert result.success is False
+        assert "already exists" in result.error
+        assert shortener.expand("duplicate") == "https://example.com"
 
-    def test_url_expiration(self):
+    def test_url_expiration(self, shortener):
         """Test URL expiration functionality"""
         # Create URL that expires in 24 hours
         request = ShortenRequest(url="https://example.com", expires_hours=24)
-        result = self.shortener.shorten(request)
+        result = shortener.shorten(request)
         
         # Should work immediately
-        expanded = self.shortener.expand(result.short_code)
+        expanded = shortener.expand(result.short_code)
         assert expanded == "https://example.com"
         
         # Check expiration is set
         assert result.expires_at is not None
         
         # Manually expire by setting expires_at to past
-        short_url_obj = self.shortener._urls[result.short_code]
+        short_url_obj = shortener.storage._urls[result.short_code]
         short_url_obj.expires_at = datetime.now(UTC) - timedelta(hours=1)
         
         # Should return None when expired
-        expanded = self.shortener.expand(result.short_code)
+        expanded = shortener.expand(result.short_code)
         assert expanded is None
 
-    def test_get_info_existing_code(self):
+    def test_get_info_existing_code(self, shortener):
         """Test getting info for an existing short code"""
         # First shorten a URL
         request = ShortenRequest(url="https://example.com", custom_code="info123")
-        result = self.shortener.shorten(request)
+        result = shortener.shorten(request)
         
         # Get info
-        info = self.shortener.get_info("info123")
+        info = shortener.get_info("info123")
         
         assert info is not None
         assert info["short_code"] == "info123"
@@ -105,49 +108,145 @@ class TestURLShortener:
         assert "created_at" in info
         assert "expires_at" in info
 
-    def test_get_info_nonexistent_code(self):
+    def test_get_info_nonexistent_code(self, shortener):
         """Test getting info for a code that doesn't exist"""
-        info = self.shortener.get_info("nonexistent")
+        info = shortener.get_info("nonexistent")
         assert info is None
 
-    def test_get_info_expired_url(self):
+    def test_get_info_expired_url(self, shortener):
         """Test getting info for an expired URL"""
         # Create URL with expiration
         request = ShortenRequest(url="https://example.com", expires_hours=1)
-        result = self.shortener.shorten(request)
+        result = shortener.shorten(request)
         
         # Manually expire by setting expires_at to past
-        short_url_obj = self.shortener._urls[result.short_code]
+        short_url_obj = shortener.storage._urls[result.short_code]
         short_url_obj.expires_at = datetime.now(UTC) - timedelta(hours=1)
         
         # Get info - should still return info but show expired
-        info = self.shortener.get_info(result.short_code)
+        info = shortener.get_info(result.short_code)
         
         assert info is not None
         assert info["is_expired"] is True
 
-    def test_stats_empty(self):
+    def test_stats_empty(self, shortener):
         """Test stats with no URLs"""
-        stats = self.shortener.stats()
+        stats = shortener.stats()
         
         assert stats["total_urls"] == 0
         assert stats["active_urls"] == 0
         assert stats["total_clicks"] == 0
 
-    def test_stats_with_urls(self):
+    def test_stats_with_urls(self, shortener):
         """Test stats with multiple URLs"""
         # Create a few URLs
-        self.shortener.shorten(ShortenRequest(url="https://example1.com"))
-        self.shortener.shorten(ShortenRequest(url="https://example2.com"))
-        self.shortener.shorten(ShortenRequest(url="https://example3.com"))
+        shortener.shorten(ShortenRequest(url="https://example1.com"))
+        shortener.shorten(ShortenRequest(url="https://example2.com"))
+        shortener.shorten(ShortenRequest(url="https://example3.com"))
         
         # Expand one to increment click count
-        codes = list(self.shortener._urls.keys())
-        self.shortener.expand(codes[0])
-        self.shortener.expand(codes[0])  # Click twice
+        codes = list(shortener.storage._urls.keys())
+        shortener.expand(codes[0])
+        shortener.expand(codes[0])  # Click twice
         
-        stats = self.shortener.stats()
+        stats = shortener.stats()
         
         assert stats["total_urls"] == 3
         assert stats["active_urls"] == 3
-        assert stats["total_clicks"] == 2 
\ No newline at end of file
+        assert stats["total_clicks"] == 2 
+    
+    def test_shorten_many(self, shortener):
+        """Test batch shortening keeps request order and per-item errors"""
+        results = shortener.shorten_many([
+            ShortenRequest(url="https://example1.com"),
+            ShortenRequest(url="not-a-url"),
+            ShortenRequest(url="https://example2.com", custom_code="batch"),
+            ShortenRequest(url="https://example3.com", custom_code="batch"),
+        ])
+        
+        assert [r.success for r in results] == [True, False, True, False]
+        assert len(results[0].short_code) == 7
+        assert results[3].error == "Short code 'batch' already exists"
+        assert shortener.expand("batch") == "https://example2.com"
+    
+    def test_get_all_urls_paging(self, shortener):
+        """Test that URL listing is newest first and honours limit/offset"""
+        for i in range(5):
+            shortener.shorten(ShortenRequest(url=f"https://example{i}.com", custom_code=f"page{i}"))
+        
+        codes = [url["short_code"] for url in shortener.get_all_urls()]
+        assert codes == ["page4", "page3", "page2", "page1", "page0"]
+        
+        page = shortener.get_all_urls(limit=2, offset=1)
+        assert [url["short_code"] for url in page] == ["page3", "page2"]
+    
+    def test_bloom_filter_disabled_when_store_unreadable(self):
+        """Test that a failed code load leaves the filter off instead of empty"""
+        class UnreachableStorage(MemoryStorage):
+            def get_all_short_codes(self):
+                raise ConnectionError("database unavailable")
+        
+        storage = UnreachableStorage()
+        config = TalisikConfig(xata_api_key="x", xata_database_url="y", enable_bloom_filter=True)
+        shortener = URLShortener(base_url="http://test.com", config=config, storage=storage)
+        assert shortener._known_codes is None
+        
+        # Once the store answers again, existing codes still resolve
+        storage.set(ShortURL(id="1", original_url="https://example.com", short_code="abc", created_at=datetime.now(UTC)))
+        assert shortener.expand("abc") == "https://example.com"
+    
+    def test_shorten_rejects_oversized_url(self, shortener):
+        """Test that URLs past the 2083-character limit are refused"""
+        result = shortener.shorten(ShortenRequest(url="https://example.com/" + "a" * 5000))
+        
+        assert not result.success
+        assert result.error == "Invalid URL provided"
+    
+    def test_expires_hours_sets_future_expiry(self, shortener):
+        """Test that expires_hours is applied as hours, not a smaller unit"""
+        before = datetime.now(UTC)
+        result = shortener.shorten(ShortenRequest(url="https://example.com", expires_hours=24))
+        
+        assert result.success
+        assert before + timedelta(hours=24) <= result.expires_at <= datetime.now(UTC) + timedelta(hours=24)
+    
+    @pytest.mark.parametrize("expires_hours", [-1, -5])
+    def test_negative_expires_hours_rejected(self, shortener, expires_hours):
+        """Test that expiries that are already past are refused, not stored"""
+        result = shortener.shorten(ShortenRequest(url="https://example.com", custom_code="past", expires_hours=expires_hours))
+        
+        assert not result.success
+        assert result.error == "expires_hours must not be negative"
+        assert shortener.get_info("past") is None
+    
+    def test_zero_expires_hours_means_no_expiry(self, shortener):
+        """Test that expires_hours=0 keeps its long-standing 'never expires' meaning"""
+        result = shortener.shorten(ShortenRequest(url="https://example.com", expires_hours=0))
+        
+        assert result.success
+        assert result.expires_at is None
+    
+    def test_shorten_many_reports_per_item_write_errors(self):
+        """Test that one failed write doesn't mark stored batch items as failed"""
+        class FlakyStorage(MemoryStorage):
+            def set_if_absent(self, short_url):
+                if short_url.short_code == "boom":
+                    raise ConnectionError("write failed")
+                return super().set_if_absent(short_url)
+            
+            def set_many_if_absent(self, short_urls):
+                # Use the per-item base implementation instead of MemoryStorage's
+                return super(MemoryStorage, self).set_many_if_absent(short_urls)
+        
+        storage = FlakyStorage()
+        config = TalisikConfig(xata_api_key="x", xata_database_url="y", storage_backend="memory")
+        shortener = URLShortener(base_url="http://test.com", config=config, storage=storage)
+        results = shortener.shorten_many([
+            ShortenRequest(url="https://example1.com", custom_code="ok1"),
+            ShortenRequest(url="https://example2.com", custom_code="boom"),
+            ShortenRequest(url="https://example3.com", custom_code="ok2"),
+        ])
+        
+        assert [r.success for r in results] == [True, False, True]
+        assert "write failed" in results[1].error
+        assert storage.exists("ok1") and storage.exists("ok2")
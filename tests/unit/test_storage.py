@@ -0,0 +1,256 @@
+"""Tests for the XataStorage read cache and write-behind click buffer"""
+
+import gc
+import threading
+import time
+import weakref
+from datetime import datetime, UTC
+
+import pytest
+
+from talisik.core.config import TalisikConfig
+from talisik.core.models import ShortURL
+from talisik.core import storage as storage_module
+from talisik.core.storage import MemoryStorage, XataStorage
+
+
+class StubSQL:
+    """Stands in for client.sql(): records statements, answers from canned rows"""
+
+    def __init__(self, rows=None):
+        self.rows = rows or {}
+        self.queries = []
+        self.fail_updates = False
+
+    def sql(self):
+        return self
+
+    def query(self, statement, params=None):
+        statement = statement.strip()
+        self.queries.append((statement, params))
+        if statement.startswith("UPDATE"):
+            if self.fail_updates:
+                raise ConnectionError("database unavailable")
+            return {"records": []}
+        if statement.startswith("DELETE"):
+            return {"records": [{"xata_id": "1"}] if self.rows.pop(params[0], None) else []}
+        if statement.startswith("WITH"):
+            if self.fail_updates:
+                raise ConnectionError("database unavailable")
+            return {"records": [{"xata_id": params[0]}]}
+        if statement.startswith("INSERT"):
+            return {"records": [{"xata_id": params[0]}]}
+        if statement.startswith("SELECT"):
+            row = self.rows.get(params[0])
+            return {"records": [dict(row)] if row else []}
+        raise AssertionError(f"unexpected statement: {statement}")
+
+    def updates(self):
+        return [params for statement, params in self.queries if statement.startswith("UPDATE")]
+
+
+def _record(short_code, click_count=0):
+    return {
+        "xata_id": "rec_" + short_code,
+        "original_url": "https://example.com",
+        "short_code": short_code,
+        "created_at": "2024-01-01T00:00:00Z",
+        "expires_at": None,
+        "click_count": click_count,
+        "is_active": True,
+    }
+
+
+class TestXataStorageCaching:
+    """Test suite for XataStorage caching and click buffering"""
+
+    def setup_method(self):
+        """Set up a XataStorage over a stub client, with timers out of the way"""
+        self.sql = StubSQL()
+        self.storage = XataStorage(TalisikConfig(xata_api_key="x", xata_database_url="y"))
+        self.storage._client = self.sql
+        self.storage._FLUSH_INTERVAL = 60
+
+    def teardown_method(self):
+        """Cancel any armed timer and drop leftovers so atexit has nothing to do"""
+        with self.storage._clicks_lock:
+            if self.storage._flush_timer is not None:
+                self.storage._flush_timer.cancel()
+                self.storage._flush_timer = None
+            self.storage._pending_clicks.clear()
+
+    def _cache(self, short_code, click_count=0):
+        short_url = ShortURL(
+            id="rec_" + short_code,
+            original_url="https://example.com",
+            short_code=short_code,
+            created_at=datetime.now(UTC),
+            click_count=click_count,
+        )
+        self.storage._get_cache.set(short_code, short_url)
+        return short_url
+
+    def test_clicks_buffer_without_sql(self):
+        """Test that cached clicks only touch memory until a flush"""
+        self._cache("abc", click_count=5)
+
+        assert self.storage.update_click_count("abc") == 6
+        assert self.storage.update_click_count("abc") == 7
+        assert self.sql.queries == []
+        assert self.storage._pending_clicks == {"abc": 2}
+        assert self.storage._flush_timer is not None
+
+    def test_threshold_triggers_flush(self):
+        """Test that reaching the pending-code threshold flushes in one UPDATE"""
+        self.storage._FLUSH_THRESHOLD = 3
+        for code in ("a", "b", "c"):
+            self._cache(code)
+        self.storage.update_click_count("a")
+        self.storage.update_click_count("a")
+        self.storage.update_click_count("b")
+        assert self.sql.updates() == []
+
+        self.storage.update_click_count("c")
+
+        assert self.sql.updates() == [["a", 2, "b", 1, "c", 1]]
+        assert not self.storage._pending_clicks
+        assert self.storage._flush_timer is None
+
+    def test_failed_flush_requeues_and_rearms_timer(self):
+        """Test that a failed UPDATE keeps the increments and schedules a retry"""
+        self._cache("abc")
+        for _ in range(3):
+            self.storage.update_click_count("abc")
+        self.sql.fail_updates = True
+
+        self.storage.flush_clicks()
+
+        assert self.storage._pending_clicks == {"abc": 3}
+        assert self.storage._flush_timer is not None
+
+        self.sql.fail_updates = False
+        self.storage.flush_clicks()
+        assert self.sql.updates()[-1] == ["abc", 3]
+        assert not self.storage._pending_clicks
+
+    def test_get_merges_pending_clicks(self):
+        """Test that a row read from the database includes unflushed clicks"""
+        self.sql.rows["abc"] = _record("abc", click_count=10)
+        self.storage._pending_clicks["abc"] = 2
+
+        short_url = self.storage.get("abc")
+
+        assert short_url.click_count == 12
+
+    def test_delete_drops_pending_clicks(self):
+        """Test that deleting a code discards its buffered increments"""
+        self.sql.rows["abc"] = _record("abc")
+        self._cache("abc")
+        self.storage.update_click_count("abc")
+
+        assert self.storage.delete("abc") is True
+        assert "abc" not in self.storage._pending_clicks
+        self.storage.flush_clicks()
+        assert self.sql.updates() == []
+
+    def test_failed_upsert_drops_cached_record(self):
+        """Test that an in-place change the database rejected isn't served from cache"""
+        self.sql.rows["abc"] = _record("abc")
+        short_url = self.storage.get("abc")
+        short_url.is_active = False  # as URLShortener.deactivate() does
+        self.sql.fail_updates = True
+
+        with pytest.raises(ConnectionError):
+            self.storage.set(short_url)
+
+        assert "abc" not in self.storage._get_cache
+        assert self.storage.get("abc").is_active is True
+
+
+
+    def test_close_flushes_and_leaves_exit_hook(self):
+        """Test that close() writes pending clicks and drops the instance from the exit flush"""
+        self._cache("abc")
+        self.storage.update_click_count("abc")
+
+        self.storage.close()
+
+        assert len(self.sql.updates()) == 1
+        assert self.storage._flush_timer is None
+        assert self.storage not in storage_module._xata_storages
+
+    def test_idle_instance_is_not_pinned_until_exit(self):
+        """Test that the exit-time flush does not keep discarded instances alive"""
+        storage = XataStorage(TalisikConfig(xata_api_key="x", xata_database_url="y"))
+        assert storage in storage_module._xata_storages
+        ref = weakref.ref(storage)
+
+        del storage
+        gc.collect()
+
+        assert ref() is None
+
+
+class _YieldingRecord:
+    """Stand-in record whose click_count read gives up the GIL mid-increment"""
+
+    expires_at = None
+    is_active = True
+
+    def __init__(self):
+        self._clicks = 0
+
+    @property
+    def click_count(self):
+        clicks = self._clicks
+        time.sleep(0)  # let another thread read the same value
+        return clicks
+
+    @click_count.setter
+    def click_count(self, value):
+        self._clicks = value
+
+
+class TestMemoryStorageClicks:
+    """Test suite for MemoryStorage click counting"""
+
+    def test_concurrent_clicks_are_not_lost(self):
+        """Test that clicks from many threads each land exactly once"""
+        storage = MemoryStorage()
+        record = storage._urls["abc"] = _YieldingRecord()
+
+        def click():
+            for _ in range(50):
+                storage.update_click_count("abc")
+                storage.get_and_increment("abc", datetime.now(UTC))
+
+        threads = [threading.Thread(target=click) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert record._clicks == 8 * 50 * 2
+
+
+class TestXataStorageClient:
+    """Test suite for XataStorage's lazy client"""
+
+    def test_concurrent_first_use_builds_one_client(self, monkeypatch):
+        """Test that parallel batch workers share a single lazily built client"""
+        built = []
+
+        def create_client(self):
+            time.sleep(0.01)  # widen the window between the check and the store
+            built.append(StubSQL())
+            return built[-1]
+
+        monkeypatch.setattr(XataStorage, "_create_client", create_client)
+        storage = XataStorage(TalisikConfig(xata_api_key="x", xata_database_url="y"))
+        short_urls = [
+            ShortURL(id="", original_url="https://example.com", short_code=f"c{i}", created_at=datetime.now(UTC))
+            for i in range(8)
+        ]
+
+        assert storage.set_many_if_absent(short_urls) == [True] * 8
+        assert len(built) == 1
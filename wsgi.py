@@ -5,15 +5,7 @@ This file is required for deployment to platforms like Leapcell.io
 
 from api.main import app
 
-# For ASGI deployment (preferred for FastAPI)
+# For ASGI deployment (preferred for FastAPI), e.g.
+# gunicorn -k uvicorn.workers.UvicornWorker wsgi:application
+# For a local server run `python -m api.main` instead
 application = app
-
-# Alternative WSGI adapter if needed
-def create_app():
-    """Factory function to create the app instance"""
-    return app
-
-# For gunicorn with uvicorn workers
-if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8080) 
\ No newline at end of file